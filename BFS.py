@@ -1,88 +1,52 @@
+import argparse # Import argparse for the grid size options
 import pygame # Import Pygame library
-import sys # Import sys for system-specific parameters and functions
-import time # Import time for time-related functions
-from collections import deque # Import deque for BFS queue
-from grid import (
-    Box, make_grid, recolor_path,
-    ROWS, COLS,
-    WHITE, BLACK, GREY, GREEN, RED, TURQUOISE, PURPLE, ORANGE
-)
-
-pygame.init() # Initialize Pygame
+from grid import make_grid, make_painter, clear_search, ROWS, COLS, WHITE, BLACK
+from panel import PanelView
+from animation import Animation, Track, DEFAULT_SPEED, change_speed
+from search import steps, bfs
+from wavefront import HAVE_NUMPY
 
 WINDOW_WIDTH = 700 # Width of the window
 WINDOW_HEIGHT = 700 # Height of the window
 
-box_width = WINDOW_WIDTH // COLS # Width of each box
-box_height = WINDOW_HEIGHT // ROWS # Height of each box
+# Window caption of each search this visualizer can run
+CAPTIONS = {
+    "bfs": "BFS Algorithm Visualization",
+    "wavefront": "Wavefront BFS Visualization",
+}
 
-# BFS algorithm implementation
+# BFS algorithm: runs the headless search and paints its progress
 def BFS_algorithm(draw, grid, start, end):
-    start_time = time.time() # Record start time
-    queue = deque()
-    queue.append(start)
-    came_from = {}
-    visited = {start}
-
-    while queue:
-        current = queue.popleft()
-
-        if current == end:
-            recolor_path(came_from, end, draw)
-            end.set_end()
-            start.set_start()
-            elapsed_time = time.time() - start_time # Calculate elapsed time
-            return round(elapsed_time, 3)
-
-        for neighbor in current.neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                came_from[neighbor] = current
-                queue.append(neighbor)
-                neighbor.color = GREEN
-
-        draw()
-
-        if current != start:
-            current.color = RED
-
-    return False
-
-# Function to get the position of the mouse click
-def get_clicked_pos(pos):
-    x, y = pos
-    row = y // box_height
-    col = x // box_width
-
-    row = max(0, min(row, ROWS - 1))
-    col = max(0, min(col, COLS - 1))
-    return row, col
-
-def main():
+    result = bfs(grid.terrain, start.index, end.index, make_painter(grid, draw))
+    if not result.found:
+        return False
+    end.set_end()
+    start.set_start()
+    return round(result.elapsed, 3)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BFS visualization.")
+    parser.add_argument("--rows", type=int, default=ROWS, help="grid rows (default: %(default)s)")
+    parser.add_argument("--cols", type=int, default=COLS, help="grid columns (default: %(default)s)")
+    args = parser.parse_args(argv)
+    pygame.init() # Initialize Pygame
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("BFS Algorithm Visualization")
+    pygame.display.set_caption(CAPTIONS["bfs"])
     elapsed_time = None
     font = pygame.font.SysFont("Arial", 24)
-    grid = make_grid()
+    grid = make_grid(args.rows, args.cols)
+    view = PanelView() # grid drawing, fitted to the window
+    view.layout(pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT), args.rows, args.cols)
     start = end = None
     running = True
+    animation = None # running search, stepped a frame at a time
+    speed = DEFAULT_SPEED
+    algorithm = "bfs" # or "wavefront" (V, needs NumPy)
+    clock = pygame.time.Clock()
 
     def draw():
         screen.fill(WHITE)
-        for row in grid:
-            for box in row:
-                rect = pygame.Rect(
-                    box.col * box_width,
-                    box.row * box_height,
-                    box_width,
-                    box_height
-                )
-                pygame.draw.rect(screen, box.color, rect)
-
-        for i in range(ROWS + 1):
-            pygame.draw.line(screen, GREY, (0, i * box_height), (WINDOW_WIDTH, i * box_height))
-        for j in range(COLS + 1):
-            pygame.draw.line(screen, GREY, (j * box_width, 0), (j * box_width, WINDOW_HEIGHT))
+        view.draw_full(screen, grid)
 
         if elapsed_time is not None:
             text = font.render(f"Time: {elapsed_time} sec", True, BLACK)
@@ -91,26 +55,49 @@ def main():
         pygame.display.update()
 
     while running:
+        if animation is not None:
+            animation.advance()
+            if animation.done:
+                result = animation.tracks[0].result
+                elapsed_time = round(result.elapsed, 3) if result.found else False
+                animation = None
         draw()
+        clock.tick(60)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and start and end:
-                    for row_list in grid:
-                        for box in row_list:
-                            box.update_neighbors(grid)
-                    elapsed_time = BFS_algorithm(draw, grid, start, end)
+                if event.key == pygame.K_SPACE and start and end and animation is None:
+                    clear_search(grid)
+                    track = Track(steps(algorithm, grid.terrain, start.index, end.index),
+                                  make_painter(grid))
+                    animation = Animation([track], speed)
+
+                if event.key == pygame.K_MINUS or event.key == pygame.K_EQUALS:
+                    speed = change_speed(speed, 1 if event.key == pygame.K_EQUALS else -1)
+                    if animation is not None:
+                        animation.speed = speed
+
+                if event.key == pygame.K_v and HAVE_NUMPY and animation is None:
+                    algorithm = "bfs" if algorithm == "wavefront" else "wavefront"
+                    pygame.display.set_caption(CAPTIONS[algorithm])
+                    clear_search(grid)
+                    elapsed_time = None
 
                 if event.key == pygame.K_c:
+                    animation = None
                     start = end = None
-                    grid = make_grid()
+                    grid = make_grid(args.rows, args.cols)
+
+        if animation is not None: # No editing while the search runs
+            continue
 
         if pygame.mouse.get_pressed()[0]:  # Left click
-            pos = pygame.mouse.get_pos()
-            row, col = get_clicked_pos(pos)
-            box = grid[row][col]
+            pos = view.cell_at(*pygame.mouse.get_pos())
+            if pos is None:
+                continue
+            box = grid[pos[0]][pos[1]]
             if not start and box != end and not box.is_wall:
                 start = box
                 start.set_start()
@@ -121,9 +108,10 @@ def main():
                 box.set_wall()
 
         elif pygame.mouse.get_pressed()[2]:  # Right click
-            pos = pygame.mouse.get_pos()
-            row, col = get_clicked_pos(pos)
-            box = grid[row][col]
+            pos = view.cell_at(*pygame.mouse.get_pos())
+            if pos is None:
+                continue
+            box = grid[pos[0]][pos[1]]
             was_start = (box == start)
             was_end = (box == end)
             box.reset()
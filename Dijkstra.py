@@ -1,114 +1,51 @@
+import argparse # Import argparse for the grid size options
 import pygame # Import Pygame library
-import sys # Import sys for system-specific parameters and functions
-import time # Import time for time-related functions
-import heapq # Import heapq for priority queue implementation
-from grid import (
-    Box, make_grid, recolor_path,
-    ROWS, COLS,
-    WHITE, BLACK, GREY, GREEN, RED, TURQUOISE, PURPLE, ORANGE
-)
-
-pygame.init() # Initialize Pygame
+from grid import make_grid, make_painter, clear_search, ROWS, COLS, WHITE, BLACK
+from panel import PanelView
+from animation import Animation, Track, DEFAULT_SPEED, change_speed
+from search import steps, dijkstra
 
 WINDOW_WIDTH = 700 # Width of the window
 WINDOW_HEIGHT = 700 # Height of the window
 
-box_width = WINDOW_WIDTH // COLS # Width of each box
-box_height = WINDOW_HEIGHT // ROWS # Height of each box
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GREY = (128, 128, 128)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-TURQUOISE = (64, 224, 208)
-PURPLE = (128, 0, 128)
-ORANGE = (255, 165, 0)
+# Window caption of each search this visualizer can run
+CAPTIONS = {
+    "dijkstra": "Dijkstra's Algorithm Visualization",
+    "bidijkstra": "Bidirectional Dijkstra Visualization",
+}
 
-# Dijkstra's algorithm implementation
+# Dijkstra's algorithm: runs the headless search and paints its progress
 def dijkstra_algorithm(draw, grid, start, end):
-    start_time = time.time()
-
-    count = 0
-    open_set = []
-    heapq.heappush(open_set, (0, count, start))
-
-    came_from = {}
-
-    g_score = {box: float("inf") for row in grid for box in row}
-    g_score[start] = 0
-
-    open_hash = {start}
-
-    while open_set:
-        current_cost, _, current = heapq.heappop(open_set)
-        open_hash.remove(current)
-
-        # reached goal
-        if current == end:
-            recolor_path(came_from, end, draw)
-            end.set_end()
-            start.set_start()
-            elapsed_time = time.time() - start_time
-            return round(elapsed_time, 3)
-
-        # explore neighbors
-        for neighbor in current.neighbors:
-            new_cost = g_score[current] + current.weight
-
-            if new_cost < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = new_cost
-
-                if neighbor not in open_hash:
-                    count += 1
-                    heapq.heappush(open_set, (new_cost, count, neighbor))
-                    open_hash.add(neighbor)
-                    neighbor.color = GREEN
-
-        draw()
-
-        if current != start:
-            current.color = RED
-
-    return False
-
-# Function to get the position of the mouse click
-def get_clicked_pos(pos):
-    x, y = pos
-    row = y // box_height
-    col = x // box_width
-
-    row = max(0, min(row, ROWS - 1))
-    col = max(0, min(col, COLS - 1))
-    return row, col
-
-def main(): # Main function to run the visualization
+    result = dijkstra(grid.terrain, start.index, end.index, make_painter(grid, draw))
+    if not result.found:
+        return False
+    end.set_end()
+    start.set_start()
+    return round(result.elapsed, 3)
+
+def main(argv=None): # Main function to run the visualization
+    parser = argparse.ArgumentParser(description="Dijkstra visualization.")
+    parser.add_argument("--rows", type=int, default=ROWS, help="grid rows (default: %(default)s)")
+    parser.add_argument("--cols", type=int, default=COLS, help="grid columns (default: %(default)s)")
+    args = parser.parse_args(argv)
+    pygame.init() # Initialize Pygame
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("Dijkstra's Algorithm Visualization")
+    pygame.display.set_caption(CAPTIONS["dijkstra"])
     elapsed_time = None
     font = pygame.font.SysFont("Arial", 24)
-    grid = make_grid()
+    grid = make_grid(args.rows, args.cols)
+    view = PanelView() # grid drawing, fitted to the window
+    view.layout(pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT), args.rows, args.cols)
     start = end = None
     running = True
+    animation = None # running search, stepped a frame at a time
+    algorithm = "dijkstra" # or "bidijkstra", toggled with B
+    speed = DEFAULT_SPEED
+    clock = pygame.time.Clock()
 
     def draw():
         screen.fill(WHITE)
-        for row in grid:
-            for box in row:
-                rect = pygame.Rect(
-                    box.col * box_width,
-                    box.row * box_height,
-                    box_width,
-                    box_height
-                )
-                pygame.draw.rect(screen, box.color, rect)
-
-        for i in range(ROWS + 1):
-            pygame.draw.line(screen, GREY, (0, i * box_height), (WINDOW_WIDTH, i * box_height))
-        for j in range(COLS + 1):
-            pygame.draw.line(screen, GREY, (j * box_width, 0), (j * box_width, WINDOW_HEIGHT))
+        view.draw_full(screen, grid)
 
         if elapsed_time is not None:
             text = font.render(f"Time: {elapsed_time} sec", True, BLACK)
@@ -118,26 +55,49 @@ def main(): # Main function to run the visualization
 
 
     while running:
+        if animation is not None:
+            animation.advance()
+            if animation.done:
+                result = animation.tracks[0].result
+                elapsed_time = round(result.elapsed, 3) if result.found else False
+                animation = None
         draw()
+        clock.tick(60)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and start and end:
-                    for row_list in grid:
-                        for box in row_list:
-                            box.update_neighbors(grid)
-                    elapsed_time = dijkstra_algorithm(draw, grid, start, end)
+                if event.key == pygame.K_SPACE and start and end and animation is None:
+                    clear_search(grid)
+                    track = Track(steps(algorithm, grid.terrain, start.index, end.index),
+                                  make_painter(grid))
+                    animation = Animation([track], speed)
+
+                if event.key == pygame.K_MINUS or event.key == pygame.K_EQUALS:
+                    speed = change_speed(speed, 1 if event.key == pygame.K_EQUALS else -1)
+                    if animation is not None:
+                        animation.speed = speed
+
+                if event.key == pygame.K_b and animation is None:
+                    algorithm = "bidijkstra" if algorithm == "dijkstra" else "dijkstra"
+                    pygame.display.set_caption(CAPTIONS[algorithm])
+                    clear_search(grid)
+                    elapsed_time = None
 
                 if event.key == pygame.K_c:
+                    animation = None
                     start = end = None
-                    grid = make_grid()
+                    grid = make_grid(args.rows, args.cols)
+
+        if animation is not None: # No editing while the search runs
+            continue
 
         if pygame.mouse.get_pressed()[0]:  # Left click
-            pos = pygame.mouse.get_pos()
-            row, col = get_clicked_pos(pos)
-            box = grid[row][col]
+            pos = view.cell_at(*pygame.mouse.get_pos())
+            if pos is None:
+                continue
+            box = grid[pos[0]][pos[1]]
             if not start and box != end and not box.is_wall:
                 start = box
                 start.set_start()
@@ -148,9 +108,10 @@ def main(): # Main function to run the visualization
                 box.set_wall()
 
         elif pygame.mouse.get_pressed()[2]:  # Right click
-            pos = pygame.mouse.get_pos()
-            row, col = get_clicked_pos(pos)
-            box = grid[row][col]
+            pos = view.cell_at(*pygame.mouse.get_pos())
+            if pos is None:
+                continue
+            box = grid[pos[0]][pos[1]]
             was_start = (box == start)
             was_end = (box == end)
             box.reset()
@@ -0,0 +1,87 @@
+import time # Import time for the per-frame budget
+
+from search import CLOSED, PATH
+
+# Frame-budgeted animation of stepped searches (search.steps). Each frame the
+# renderer calls advance(), which runs every track for a fixed number of
+# steps, or until the frame's time budget is spent, and then redraws once.
+
+AUTO = "auto"        # as many steps as fit in FRAME_BUDGET
+INSTANT = "instant"  # run to completion in one frame
+
+# Speeds cycled by the UI: steps per frame, then auto and instant
+SPEEDS = (1, 5, 25, 100, 500, AUTO, INSTANT)
+DEFAULT_SPEED = AUTO
+
+FRAME_BUDGET = 0.012 # seconds of stepping per frame in AUTO mode
+AUTO_CHUNK = 16      # steps per track between budget checks in AUTO mode
+
+# Readable name of a speed
+def speed_name(speed):
+    if speed == AUTO:
+        return "Auto"
+    if speed == INSTANT:
+        return "Instant"
+    return f"{speed} steps/frame"
+
+# Next slower (-1) or faster (+1) speed
+def change_speed(speed, direction):
+    i = SPEEDS.index(speed) + direction
+    return SPEEDS[max(0, min(i, len(SPEEDS) - 1))]
+
+# One animated search: its step generator and a paint(event, cell) callback
+class Track:
+    __slots__ = ("steps", "paint", "result")
+
+    def __init__(self, steps, paint):
+        self.steps = steps
+        self.paint = paint
+        self.result = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    # Run up to n steps (expansions and path cells); n=None runs to the end
+    def advance(self, n=None):
+        steps = self.steps
+        paint = self.paint
+        taken = 0
+        while n is None or taken < n:
+            try:
+                event, cell = next(steps)
+            except StopIteration as stop:
+                self.result = stop.value
+                break
+            paint(event, cell)
+            if event == CLOSED or event == PATH:
+                taken += 1
+        return taken
+
+# Several tracks animated side by side, all advancing by the same amount per frame
+class Animation:
+    __slots__ = ("tracks", "speed")
+
+    def __init__(self, tracks, speed=DEFAULT_SPEED):
+        self.tracks = tracks
+        self.speed = speed
+
+    @property
+    def done(self):
+        return all(track.done for track in self.tracks)
+
+    # Advance every unfinished track for one frame
+    def advance(self):
+        running = [track for track in self.tracks if not track.done]
+        if self.speed == INSTANT:
+            for track in running:
+                track.advance()
+        elif self.speed == AUTO:
+            deadline = time.perf_counter() + FRAME_BUDGET
+            while running and time.perf_counter() < deadline:
+                for track in running:
+                    track.advance(AUTO_CHUNK)
+                running = [track for track in running if not track.done]
+        else:
+            for track in running:
+                track.advance(self.speed)
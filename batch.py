@@ -0,0 +1,150 @@
+import argparse # Import argparse for the command line interface
+import multiprocessing # Import multiprocessing for the worker pool
+import random # Import random for generated queries
+import time # Import time for wall-clock timing
+from multiprocessing import shared_memory # Import shared_memory to share the terrain
+
+from grid import Terrain
+from search import ALGORITHMS, QUEUED, run
+
+# Batch queries: many (start, end) pairs on one terrain, spread over a pool
+# of worker processes. The terrain is copied once into a shared memory block
+# (walls, then weights) that every worker maps read-only, so neither the
+# terrain nor any Box is pickled per query; only the pairs and the results
+# cross process boundaries. Results stream back as workers finish them, in
+# no particular order, tagged with the index of their pair.
+#
+# A batch sees the terrain as it was when the batch was created; edit the
+# terrain and create a new batch to query the edited map.
+#
+#   with Batch(terrain) as batch:
+#       for index, result in batch.run("astar", pairs):
+#           ...
+
+CHUNK = 64 # pairs per task: large enough to amortize the IPC per task
+
+# Terrain of this worker process, viewing the shared block
+_memory = None
+_terrain = None
+
+def _attach(name, rows, cols):
+    global _memory, _terrain
+    _memory = shared_memory.SharedMemory(name=name)
+    size = rows * cols
+    _terrain = Terrain(rows, cols, _memory.buf[:size], _memory.buf[size:2 * size])
+
+# Run one chunk of (index, start, end) queries in a worker
+def _search(name, queue, chunk):
+    return [(index, run(name, _terrain, start, end, queue=queue)) for index, start, end in chunk]
+
+def _search_task(task):
+    return _search(*task)
+
+class Batch:
+    __slots__ = ("rows", "cols", "memory", "pool")
+
+    def __init__(self, terrain, workers=None):
+        size = len(terrain)
+        self.rows = terrain.rows
+        self.cols = terrain.cols
+        self.memory = shared_memory.SharedMemory(create=True, size=max(2 * size, 1))
+        self.memory.buf[:size] = terrain.walls
+        self.memory.buf[size:2 * size] = terrain.weights
+        self.pool = multiprocessing.Pool(workers, _attach, (self.memory.name, self.rows, self.cols))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Run an algorithm (a name in search.ALGORITHMS) on every (start, end)
+    # pair; yields (index, SearchResult) as results arrive, where index is
+    # the pair's position in pairs. queue picks the priority queue of the
+    # algorithms in search.QUEUED.
+    def run(self, name, pairs, queue=None, chunksize=CHUNK):
+        if name not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {name!r}")
+        if queue is not None and name not in QUEUED:
+            raise ValueError(f"{name} does not take a priority queue")
+        size = self.rows * self.cols
+        chunk = []
+        tasks = []
+        for index, (start, end) in enumerate(pairs):
+            if not (0 <= start < size and 0 <= end < size):
+                raise ValueError(f"pair {index} ({start}, {end}) is outside the grid")
+            chunk.append((index, start, end))
+            if len(chunk) == chunksize:
+                tasks.append((name, queue, chunk))
+                chunk = []
+        if chunk:
+            tasks.append((name, queue, chunk))
+        for results in self.pool.imap_unordered(_search_task, tasks):
+            yield from results
+
+    # Stop the workers and free the shared block
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            self.memory.close()
+            self.memory.unlink()
+
+# Run one algorithm over many pairs with a temporary pool; returns the
+# SearchResults in the order of pairs
+def run_batch(name, terrain, pairs, workers=None, queue=None):
+    pairs = list(pairs)
+    results = [None] * len(pairs)
+    with Batch(terrain, workers) as batch:
+        for index, result in batch.run(name, pairs, queue):
+            results[index] = result
+    return results
+
+# Random pairs of open cells
+def random_pairs(terrain, count, seed=None):
+    rng = random.Random(seed)
+    cells = [cell for cell in range(len(terrain)) if not terrain.walls[cell]]
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(count)]
+
+# Throughput check: queries per second on a generated scenario, with and
+# without the pool
+#
+#   python batch.py --size 200 --queries 2000 --workers 1 2 4
+#   python batch.py --scen maps/scenario1.scen
+def main(argv=None):
+    from benchmark import make_scenario
+    from mapio import load_scen
+    parser = argparse.ArgumentParser(description="Batch query throughput.")
+    parser.add_argument("--algorithm", default="astar", choices=sorted(ALGORITHMS))
+    parser.add_argument("--size", type=int, default=200, help="grid side (default: %(default)s)")
+    parser.add_argument("--walls", type=float, default=0.2, help="wall density (default: %(default)s)")
+    parser.add_argument("--queries", type=int, default=1000, help="number of pairs (default: %(default)s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[multiprocessing.cpu_count()],
+                        help="pool sizes to try (default: one per core)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scen", help="MovingAI .scen file to take the map and queries from")
+    args = parser.parse_args(argv)
+
+    if args.scen:
+        terrain, pairs = load_scen(args.scen)
+    else:
+        terrain, _, _ = make_scenario(args.size, args.walls, 0.1, 0.05, args.seed)
+        pairs = random_pairs(terrain, args.queries, args.seed)
+
+    t0 = time.perf_counter()
+    for start, end in pairs:
+        run(args.algorithm, terrain, start, end)
+    serial = time.perf_counter() - t0
+    print(f"serial: {len(pairs) / serial:.1f} queries/s")
+
+    for workers in args.workers:
+        with Batch(terrain, workers) as batch:
+            t0 = time.perf_counter()
+            for _ in batch.run(args.algorithm, pairs):
+                pass
+            elapsed = time.perf_counter() - t0
+        print(f"{workers} workers: {len(pairs) / elapsed:.1f} queries/s ({serial / elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse # Import argparse for the command line interface
+import csv # Import csv for the CSV report
+import itertools # Import itertools for the scenario matrix
+import json # Import json for the JSON report
+import os # Import os to locate the repository
+import platform # Import platform to record the interpreter
+import random # Import random for scenario generation
+import statistics # Import statistics for medians
+import subprocess # Import subprocess to record the git commit
+import sys # Import sys for stdout output
+import time # Import time for wall-clock timing
+import tracemalloc # Import tracemalloc for peak memory
+
+from grid import Terrain, MUD_WEIGHT, WATER_WEIGHT
+from instrument import Probe
+from pqueue import QUEUES
+from search import ALGORITHMS, QUEUED, release_states, run
+
+# Headless benchmark: runs the algorithms over a matrix of generated scenarios
+# and writes JSON/CSV reports that can be compared across commits.
+#
+#   python benchmark.py --sizes 25 100 --walls 0.1 0.3 --terrain 0:0 0.2:0.1 \
+#       --seeds 1 2 --repeat 7 --queues heap dial --json bench.json --csv bench.csv
+
+# Generate a square terrain with random walls, mud and water.
+# Start is the top-left cell and end the bottom-right cell; both are kept open.
+def make_scenario(size, wall_density, mud, water, seed):
+    rng = random.Random(seed)
+    terrain = Terrain(size, size)
+    walls = terrain.walls
+    weights = terrain.weights
+    for i in range(len(terrain)):
+        x = rng.random()
+        if x < wall_density:
+            walls[i] = 1
+        elif x < wall_density + mud:
+            weights[i] = MUD_WEIGHT
+        elif x < wall_density + mud + water:
+            weights[i] = WATER_WEIGHT
+    start = 0
+    end = len(terrain) - 1
+    for cell in (start, end):
+        walls[cell] = 0
+    return terrain, start, end
+
+# Nearest-rank percentile of a list of numbers
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+# Benchmark one algorithm on one scenario; queue picks the priority queue
+# of the algorithms in search.QUEUED
+def bench_case(name, terrain, start, end, repeat, probe=False, queue=None):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = run(name, terrain, start, end, queue=queue)
+        times.append(time.perf_counter() - t0)
+
+    # Peak memory is measured in a separate run so tracing does not skew
+    # timings, from a cold start so it includes the per-cell search state
+    release_states()
+    tracemalloc.start()
+    run(name, terrain, start, end, queue=queue)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    record = {
+        "algorithm": name,
+        "queue": queue or "",
+        "found": result.found,
+        "cost": result.cost,
+        "path_length": result.path_length,
+        "expansions": result.expansions,
+        "pushes": result.pushes,
+        "max_open": result.max_open,
+        "median_s": statistics.median(times),
+        "p95_s": percentile(times, 95),
+        "peak_kib": round(peak / 1024, 1),
+        "repeat": repeat,
+    }
+
+    # Phase timings and counters also come from their own instrumented run
+    if probe:
+        instrumented = Probe()
+        run(name, terrain, start, end, probe=instrumented, queue=queue)
+        record.update(instrumented.report())
+    return record
+
+# Run the whole scenario matrix, yielding one record per case. Algorithms
+# with a priority queue run once per queue, the others once.
+def run_matrix(sizes, walls, terrains, seeds, algorithms, repeat, probe=False, queues=("heap",)):
+    for size, wall_density, (mud, water), seed in itertools.product(sizes, walls, terrains, seeds):
+        terrain, start, end = make_scenario(size, wall_density, mud, water, seed)
+        for name in algorithms:
+            for queue in (queues if name in QUEUED else (None,)):
+                record = {
+                    "size": size,
+                    "walls": wall_density,
+                    "mud": mud,
+                    "water": water,
+                    "seed": seed,
+                }
+                record.update(bench_case(name, terrain, start, end, repeat, probe, queue))
+                yield record
+
+# Commit of the working tree, if this is a git checkout
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+# Parse "mud:water" fractions
+def terrain_mix(text):
+    mud, _, water = text.partition(":")
+    return float(mud), float(water or 0)
+
+def write_json(path, records, args):
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": records,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def write_csv(path, records):
+    if not records:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark BFS, Dijkstra and A* headlessly.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100])
+    parser.add_argument("--walls", type=float, nargs="+", default=[0.0, 0.2, 0.3],
+                        help="wall densities")
+    parser.add_argument("--terrain", type=terrain_mix, nargs="+", default=[(0.0, 0.0), (0.2, 0.1)],
+                        help="mud:water fractions, e.g. 0.2:0.1")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(ALGORITHMS),
+                        default=["bfs", "dijkstra", "astar"])
+    parser.add_argument("--queues", nargs="+", choices=sorted(QUEUES), default=["heap"],
+                        help="priority queues for Dijkstra and A* variants")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--probe", action="store_true",
+                        help="add per-phase timings and counters from an instrumented run")
+    parser.add_argument("--json", help="write results as JSON to this path")
+    parser.add_argument("--csv", help="write results as CSV to this path")
+    args = parser.parse_args(argv)
+
+    records = []
+    for record in run_matrix(args.sizes, args.walls, args.terrain, args.seeds,
+                             args.algorithms, args.repeat, args.probe, args.queues):
+        records.append(record)
+        print(f"{record['algorithm']:>10} {record['queue']:<5} size={record['size']:<5} walls={record['walls']:<4} "
+              f"mud={record['mud']:<4} water={record['water']:<4} seed={record['seed']:<3} "
+              f"median={record['median_s'] * 1000:9.3f}ms p95={record['p95_s'] * 1000:9.3f}ms "
+              f"expanded={record['expansions']:<8} peak={record['peak_kib']}KiB",
+              file=sys.stdout)
+
+    if args.json:
+        write_json(args.json, records, args)
+    if args.csv:
+        write_csv(args.csv, records)
+
+if __name__ == "__main__":
+    main()
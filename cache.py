@@ -0,0 +1,102 @@
+from collections import OrderedDict # Import OrderedDict for LRU order
+
+from search import run
+
+# Cache of query results (SearchResults, or tracing.Traces in the UI) keyed
+# by the terrain's fingerprint (grid.Terrain.fingerprint), its size, start,
+# end, algorithm and an optional variant (e.g. the priority queue). The least
+# recently used entries are evicted beyond capacity entries or, if max_bytes
+# is given, beyond max_bytes of values in all; values then need an nbytes
+# size (tracing.Trace has one), since one trace of a search on a large map
+# can take tens of megabytes.
+#
+# After an edit the terrain's fingerprint changes, so entries for the old
+# terrain stop matching. edited() carries over the entries the edit cannot
+# affect: weights are at least 1, so a search that found a path of cost C
+# never looks at cells more than C + 1 steps from start or end (for the
+# bidirectional searches, from either end). Only results whose search may
+# have looked at an edited cell are dropped. Results of searches that found
+# no path, and of JPS (whose row scans reach arbitrarily far), are kept
+# only for the terrain they were computed on.
+
+# Algorithms whose searches stay within cost + 1 steps of start and end
+BOUNDED = ("bfs", "wavefront", "dijkstra", "astar", "bidijkstra", "biastar")
+
+class QueryCache:
+    __slots__ = ("capacity", "max_bytes", "entries", "nbytes", "hits", "misses")
+
+    def __init__(self, capacity=256, max_bytes=None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, reach, size); reach is None or cost + 1
+        self.nbytes = 0              # total size of the values, with max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(terrain, algorithm, start, end, variant=None):
+        return (terrain.fingerprint, terrain.rows, terrain.cols, algorithm, start, end, variant)
+
+    # Cached value for a query, or None (counted as a hit or a miss)
+    def get(self, terrain, algorithm, start, end, variant=None):
+        key = self.key(terrain, algorithm, start, end, variant)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    # Store a value; result is its SearchResult, which bounds what it depends on
+    def put(self, terrain, algorithm, start, end, value, result, variant=None):
+        reach = result.cost + 1 if result.found and algorithm in BOUNDED else None
+        size = 0 if self.max_bytes is None else value.nbytes
+        key = self.key(terrain, algorithm, start, end, variant)
+        old = self.entries.get(key)
+        if old is not None:
+            self.nbytes -= old[2]
+        self.entries[key] = (value, reach, size)
+        self.entries.move_to_end(key)
+        self.nbytes += size
+        while len(self.entries) > self.capacity or (self.max_bytes is not None
+                                                    and self.nbytes > self.max_bytes):
+            self.nbytes -= self.entries.popitem(last=False)[1][2]
+
+    # Carry entries over an edit: before is the terrain's fingerprint before
+    # the cells were changed. Entries the edit may affect are dropped, the
+    # others are re-keyed to the current fingerprint.
+    def edited(self, terrain, cells, before):
+        after = terrain.fingerprint
+        if after == before or not cells:
+            return
+        rows, cols = terrain.rows, terrain.cols
+        points = [divmod(cell, cols) for cell in cells]
+        kept = OrderedDict() # rebuilt in the same LRU order
+        for key, entry in self.entries.items():
+            reach = entry[1]
+            fingerprint, key_rows, key_cols, algorithm, start, end, variant = key
+            if fingerprint == before and key_rows == rows and key_cols == cols:
+                if reach is None:
+                    continue
+                start_row, start_col = divmod(start, cols)
+                end_row, end_col = divmod(end, cols)
+                if any(abs(row - start_row) + abs(col - start_col) <= reach or
+                       abs(row - end_row) + abs(col - end_col) <= reach
+                       for row, col in points):
+                    continue
+                key = (after, rows, cols, algorithm, start, end, variant)
+            kept[key] = entry
+        self.entries = kept
+        self.nbytes = sum(entry[2] for entry in kept.values())
+
+    # Run a search by name through the cache (see search.run)
+    def run(self, name, terrain, start, end, queue=None):
+        result = self.get(terrain, name, start, end, queue)
+        if result is None:
+            result = run(name, terrain, start, end, queue=queue)
+            self.put(terrain, name, start, end, result, result, queue)
+        return result
@@ -1,4 +1,6 @@
-# Number of rows and columns
+import re # Import re to find non-default cells at C speed
+
+# Default number of rows and columns; grids take their size at runtime
 ROWS = 25
 COLS = 25
 
@@ -14,94 +16,294 @@ ORANGE = (255, 165, 0)
 BROWN = (150, 75, 0)
 BLUE = (0, 100, 255)
 
-# Box class representing each cell in the grid
-class Box:
-    def __init__(self, row, col): # Initialize box with row and column
+# Cell states, stored as one byte per cell; PALETTE maps each state to its color
+EMPTY, START, END, WALL, MUD, WATER, OPEN, CLOSED, PATH = range(9)
+PALETTE = (WHITE, ORANGE, TURQUOISE, BLACK, BROWN, BLUE, GREEN, RED, PURPLE)
+STATE_OF_COLOR = {color: state for state, color in enumerate(PALETTE)}
+
+# Terrain weights
+NORMAL_WEIGHT = 1
+MUD_WEIGHT = 3
+WATER_WEIGHT = 5
+
+# Zobrist-style fingerprint of a terrain: the XOR of a 64-bit key per cell
+# that is a wall or not of normal weight (plain cells contribute nothing, so
+# an empty terrain is 0). Keys come from splitmix64 of the cell and its
+# contents, so no key table is stored.
+MASK64 = (1 << 64) - 1
+find_wall = re.compile(b"[^\x00]").finditer
+find_weighted = re.compile(b"[^\x01]").finditer
+
+def splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+def cell_key(index, wall, weight):
+    if not wall and weight == NORMAL_WEIGHT:
+        return 0
+    return splitmix64(index << 9 | (256 if wall else 0) | weight)
+
+# Flat terrain model: cells are addressed by index = row * cols + col,
+# walls is a 0/1 byte per cell and weights holds the cost of leaving a cell.
+# Edit cells with edit() so the fingerprint stays current; the arrays can be
+# filled directly until the fingerprint is first asked for.
+class Terrain:
+    __slots__ = ("rows", "cols", "walls", "weights", "_fingerprint")
+
+    def __init__(self, rows, cols, walls=None, weights=None):
+        self.rows = rows
+        self.cols = cols
+        self.walls = bytearray(rows * cols) if walls is None else walls
+        self.weights = bytearray([NORMAL_WEIGHT]) * (rows * cols) if weights is None else weights
+        self._fingerprint = None # computed on first use, then kept up to date by edit()
+
+    def __len__(self): # Number of cells
+        return self.rows * self.cols
+
+    def index(self, row, col): # Cell index of (row, col)
+        return row * self.cols + col
+
+    def coords(self, index): # (row, col) of a cell index
+        return divmod(index, self.cols)
+
+    def neighbors(self, index): # Open neighbors of a cell (Down, Up, Right, Left)
+        cols = self.cols
+        walls = self.walls
+        row, col = divmod(index, cols)
+        adj = []
+        if row < self.rows - 1 and not walls[index + cols]:
+            adj.append(index + cols)
+        if row > 0 and not walls[index - cols]:
+            adj.append(index - cols)
+        if col < cols - 1 and not walls[index + 1]:
+            adj.append(index + 1)
+        if col > 0 and not walls[index - 1]:
+            adj.append(index - 1)
+        return adj
+
+    def copy(self): # Independent copy of the terrain
+        terrain = Terrain(self.rows, self.cols, bytearray(self.walls), bytearray(self.weights))
+        terrain._fingerprint = self._fingerprint
+        return terrain
+
+    @property
+    def fingerprint(self): # 64-bit hash of walls and weights
+        if self._fingerprint is None:
+            walls = self.walls
+            weights = self.weights
+            cells = {m.start() for m in find_wall(walls)}
+            cells.update(m.start() for m in find_weighted(weights))
+            fingerprint = 0
+            for index in cells:
+                fingerprint ^= cell_key(index, walls[index], weights[index])
+            self._fingerprint = fingerprint
+        return self._fingerprint
+
+    def edit(self, index, wall=None, weight=None): # Set a cell's wall and/or weight
+        walls = self.walls
+        weights = self.weights
+        old = cell_key(index, walls[index], weights[index])
+        if wall is not None:
+            walls[index] = wall
+        if weight is not None:
+            weights[index] = weight
+        if self._fingerprint is not None:
+            self._fingerprint ^= old ^ cell_key(index, walls[index], weights[index])
+
+# Grid of the UI: a terrain plus one display state byte per cell.
+# grid[row][col] returns a Box view, so existing row/column code keeps working.
+class Grid:
+    __slots__ = ("terrain", "rows", "cols", "states")
+
+    def __init__(self, rows, cols, terrain=None): # terrain: share an existing one
+        self.terrain = Terrain(rows, cols) if terrain is None else terrain
+        self.rows = rows
+        self.cols = cols
+        self.states = bytearray(rows * cols)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        return _Row(self, row)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield _Row(self, row)
+
+    def box(self, index): # Box view of a cell index
+        return Box(self, index)
+
+# One row of a Grid
+class _Row:
+    __slots__ = ("grid", "row")
+
+    def __init__(self, grid, row):
+        self.grid = grid
         self.row = row
-        self.col = col
-        self.color = WHITE
-        self.neighbors = []
-        self.is_wall = False
-        self.weight = 1 # default weight
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, col):
+        if not 0 <= col < self.grid.cols:
+            raise IndexError(col)
+        return Box(self.grid, self.row * self.grid.cols + col)
+
+    def __iter__(self):
+        grid = self.grid
+        first = self.row * grid.cols
+        for index in range(first, first + grid.cols):
+            yield Box(grid, index)
+
+# Box class: lightweight view of one cell of a Grid
+class Box:
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid, index): # View the cell at index of grid
+        self.grid = grid
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, Box) and self.grid is other.grid and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.grid), self.index))
+
+    @property
+    def row(self):
+        return self.index // self.grid.cols
+
+    @property
+    def col(self):
+        return self.index % self.grid.cols
+
+    @property
+    def color(self):
+        return PALETTE[self.grid.states[self.index]]
+
+    @color.setter
+    def color(self, color):
+        self.grid.states[self.index] = STATE_OF_COLOR[color]
+
+    @property
+    def is_wall(self):
+        return bool(self.grid.terrain.walls[self.index])
+
+    @property
+    def weight(self):
+        return self.grid.terrain.weights[self.index]
+
+    @property
+    def neighbors(self): # Open neighbors, derived from the terrain
+        grid = self.grid
+        return [Box(grid, i) for i in grid.terrain.neighbors(self.index)]
 
     def set_start(self): # Set box as start
-        self.color = ORANGE
+        self.grid.states[self.index] = START
 
     def set_end(self): # Set box as end
-        self.color = TURQUOISE
+        self.grid.states[self.index] = END
 
     def set_wall(self): # Set box as wall
-        self.color = BLACK
-        self.is_wall = True
+        self.grid.states[self.index] = WALL
+        self.grid.terrain.edit(self.index, wall=1)
 
     def set_mud(self): # Weighted box (3)
-        self.color = BROWN
-        self.weight = 3
+        self.grid.states[self.index] = MUD
+        self.grid.terrain.edit(self.index, weight=MUD_WEIGHT)
 
     def set_water(self): # Weighted box (5)
-        self.color = BLUE
-        self.weight = 5
+        self.grid.states[self.index] = WATER
+        self.grid.terrain.edit(self.index, weight=WATER_WEIGHT)
 
     def reset(self): # Reset box to default
-        self.color = WHITE
-        self.is_wall = False
-        self.weight = 1
+        self.grid.states[self.index] = EMPTY
+        self.grid.terrain.edit(self.index, wall=0, weight=NORMAL_WEIGHT)
 
     def is_start(self): # Check if box is start
-        return self.color == ORANGE
+        return self.grid.states[self.index] == START
 
     def is_end(self): # Check if box is end
-        return self.color == TURQUOISE
+        return self.grid.states[self.index] == END
 
     def is_closed(self): # Check if box is closed
-        return self.color == RED
+        return self.grid.states[self.index] == CLOSED
 
     def is_open(self): # Check if box is open
-        return self.color == GREEN
+        return self.grid.states[self.index] == OPEN
 
     def is_path(self): # Check if box is part of the path
-        return self.color == PURPLE
-
-    def update_neighbors(self, grid): # Update neighbors of the box
-        self.neighbors = []
-        # Down
-        if self.row < ROWS - 1 and not grid[self.row + 1][self.col].is_wall:
-            self.neighbors.append(grid[self.row + 1][self.col])
-        # Up
-        if self.row > 0 and not grid[self.row - 1][self.col].is_wall:
-            self.neighbors.append(grid[self.row - 1][self.col])
-        # Right
-        if self.col < COLS - 1 and not grid[self.row][self.col + 1].is_wall:
-            self.neighbors.append(grid[self.row][self.col + 1])
-        # Left
-        if self.col > 0 and not grid[self.row][self.col - 1].is_wall:
-            self.neighbors.append(grid[self.row][self.col - 1])
-
-# Function to recolor the final path purple and return its length in steps
-def recolor_path(came_from, current, draw):
-    length = 0
-    while current in came_from:
-        current = came_from[current]
-        current.color = PURPLE
-        draw()
-        length += 1
-    return length
-
-# Function to create the grid
-def make_grid():
-    return [[Box(r, c) for c in range(COLS)] for r in range(ROWS)]
-
-def expanded_and_path(grid):
-    expanded = 0     # number of closed (RED) nodes
-    path_len = 0     # number of purple tiles
-    path_cost = 0    # sum of weights of purple tiles
-
-    for row in grid:
-        for box in row:
-            if box.is_closed():
-                expanded += 1
-            if box.is_path():
-                path_len += 1
-                path_cost += box.weight
-
-    return expanded, path_len, path_cost
+        return self.grid.states[self.index] == PATH
+
+# Build a search observer that colors cells like the original visualizers:
+# frontier green, expanded red, path purple. If draw is given it is called
+# after every expansion and path cell, as the original visualizers did.
+def make_painter(grid, draw=None):
+    states = grid.states
+
+    def paint(event, index):
+        if draw is not None and event == "closed":
+            draw()
+        if states[index] == START or states[index] == END:
+            return
+        if event == "open":
+            states[index] = OPEN
+        elif event == "closed":
+            states[index] = CLOSED
+        elif event == "path":
+            states[index] = PATH
+            if draw is not None:
+                draw()
+    return paint
+
+# Byte tables for clear_search: search states -> 0xFF, walls -> 0xFF and
+# weights -> the state that shows them
+SEARCH_MASK = bytes(0xFF if state in (OPEN, CLOSED, PATH) else 0 for state in range(256))
+WALL_MASK = bytes([0]) + bytes([0xFF]) * 255
+WEIGHT_STATES = bytes(MUD if w == MUD_WEIGHT else WATER if w == WATER_WEIGHT else EMPTY
+                      for w in range(256))
+
+# Clear search colors (open, closed, path) back to the terrain underneath.
+# Works on whole byte strings with big-int masks, so it stays fast on large
+# grids, and writes into the same states buffer.
+def clear_search(grid):
+    states = grid.states
+    size = len(states)
+    as_int = int.from_bytes
+    searched = as_int(states.translate(SEARCH_MASK), "little")
+    cleared = (as_int(states, "little") & ~searched) | (terrain_states(grid.terrain) & searched)
+    states[:] = cleared.to_bytes(size, "little")
+
+# States that show a terrain's walls and weights, as one little-endian int
+def terrain_states(terrain):
+    size = len(terrain)
+    as_int = int.from_bytes
+    walls = as_int(bytes(terrain.walls).translate(WALL_MASK), "little")
+    return ((as_int(bytes(terrain.weights).translate(WEIGHT_STATES), "little") & ~walls)
+            | (as_int(bytes([WALL]) * size, "little") & walls))
+
+# Function to create a grid, 25x25 unless a size is given
+def make_grid(rows=ROWS, cols=COLS):
+    return Grid(rows, cols)
+
+# Grid showing a copy of a terrain, e.g. a loaded map
+def grid_of(terrain):
+    grid = Grid(terrain.rows, terrain.cols)
+    grid.terrain = terrain.copy()
+    grid.states[:] = terrain_states(grid.terrain).to_bytes(len(terrain), "little")
+    return grid
+
+# Grid drawing over a terrain shared with other grids: only the state bytes
+# (search colors, start and end marks) are its own, so several panels of one
+# map cost one terrain plus a byte per cell each. Edits through any of them
+# change the shared terrain; the others show the edited cell once its state
+# is copied to them.
+def overlay_of(terrain):
+    grid = Grid(terrain.rows, terrain.cols, terrain)
+    grid.states[:] = terrain_states(terrain).to_bytes(len(terrain), "little")
+    return grid
@@ -0,0 +1,295 @@
+import time # Import time for time-related functions
+import heapq # Import heapq for priority queue implementation
+
+from search import OPEN, CLOSED, finish, heuristic, neighbor_steps
+
+# Hierarchical pathfinding (HPA*). The grid is split into square clusters;
+# where two clusters touch, each run of open cells along their border gets
+# one entrance (two, at its ends, if the run is long). Entrances are linked
+# across borders and, within a cluster, by the cost of the cheapest path
+# between them inside the cluster. Costs are directed, like the search core:
+# moving out of a cell costs its weight.
+#
+# A query connects start and end to the entrances of their clusters, runs A*
+# over this small abstract graph and refines each abstract edge into cells
+# with a search confined to one cluster, so its cost depends on the path's
+# length in clusters rather than on the size of the map. Paths are
+# near-optimal: they can only cross cluster borders at entrances.
+#
+# Building the graph costs a few cluster-local searches per cluster; after
+# edits, update(cells) rebuilds only the clusters around the edited cells.
+
+CLUSTER_SIZE = 16  # cluster side in cells
+WIDE_ENTRANCE = 6  # border runs at least this long get an entrance at each end
+
+# Search from source over the open cells of a rectangle of rows
+# row0..row1-1 and columns col0..col1-1: Dijkstra, or A* when a single goal
+# is given. With backward=True, dist is the cost of reaching source instead
+# of leaving it. Stops once every cell of targets (or the goal) is settled.
+# Returns (dist, came_from, expansions).
+def local_search(terrain, source, bounds, targets=None, backward=False, goal=None):
+    cols = terrain.cols
+    walls = terrain.walls
+    weights = terrain.weights
+    row0, row1, col0, col1 = bounds
+    second_row = (row0 + 1) * cols # cells from here on have a row above them
+    last_row = (row1 - 1) * cols   # cells before this have a row below them
+    offsets = neighbor_steps(cols)
+    if goal is not None:
+        targets = (goal,)
+        goal_row, goal_col = divmod(goal, cols)
+    remaining = set(targets) if targets is not None else None
+    dist = {source: 0}
+    came_from = {}
+    settled = set()
+    heap = [(0, 0, source)]
+    while heap:
+        _, cost, current = heapq.heappop(heap)
+        if current in settled:
+            continue
+        settled.add(current)
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        col = current % cols
+        mask = ((current < last_row) | (current >= second_row) << 1
+                | (col + 1 < col1) << 2 | (col > col0) << 3)
+        weight = weights[current]
+        for step in offsets[mask]:
+            neighbor = current + step
+            if walls[neighbor]:
+                continue
+            new_cost = cost + (weights[neighbor] if backward else weight)
+            if new_cost < dist.get(neighbor, float("inf")):
+                dist[neighbor] = new_cost
+                came_from[neighbor] = current
+                if goal is None:
+                    heapq.heappush(heap, (new_cost, new_cost, neighbor))
+                else:
+                    row, col = divmod(neighbor, cols)
+                    guess = new_cost + abs(row - goal_row) + abs(col - goal_col)
+                    heapq.heappush(heap, (guess, new_cost, neighbor))
+    return dist, came_from, len(settled)
+
+class HPAStar:
+    __slots__ = ("terrain", "size", "cluster_rows", "cluster_cols",
+                 "borders", "partners", "nodes", "edges")
+
+    def __init__(self, terrain, size=CLUSTER_SIZE):
+        self.terrain = terrain  # shared with the caller; edits are seen through update()
+        self.size = size
+        self.cluster_rows = -(-terrain.rows // size)
+        self.cluster_cols = -(-terrain.cols // size)
+        self.borders = {}  # (cluster, cluster right of or below it) -> [(cell, cell)]
+        self.partners = {} # entrance -> entrances across a border
+        self.nodes = [set() for _ in range(self.cluster_rows * self.cluster_cols)]
+        self.edges = {}    # entrance -> [(entrance, cost)] inside its cluster
+        for cluster in range(len(self.nodes)):
+            for other in self._next_clusters(cluster):
+                self._build_border(cluster, other)
+        for cluster in range(len(self.nodes)):
+            self._build_edges(cluster)
+
+    def cluster_of(self, cell):
+        row, col = divmod(cell, self.terrain.cols)
+        return row // self.size * self.cluster_cols + col // self.size
+
+    # (row0, row1, col0, col1) of a cluster
+    def bounds(self, cluster):
+        crow, ccol = divmod(cluster, self.cluster_cols)
+        row0, col0 = crow * self.size, ccol * self.size
+        return (row0, min(row0 + self.size, self.terrain.rows),
+                col0, min(col0 + self.size, self.terrain.cols))
+
+    # Clusters to the right of and below a cluster
+    def _next_clusters(self, cluster):
+        crow, ccol = divmod(cluster, self.cluster_cols)
+        if ccol + 1 < self.cluster_cols:
+            yield cluster + 1
+        if crow + 1 < self.cluster_rows:
+            yield cluster + self.cluster_cols
+
+    # Place the entrances on the border between cluster and other (right or below)
+    def _build_border(self, cluster, other):
+        terrain = self.terrain
+        cols = terrain.cols
+        walls = terrain.walls
+        row0, row1, col0, col1 = self.bounds(cluster)
+        if other // self.cluster_cols == cluster // self.cluster_cols: # side by side: last column of cluster, first of other
+            crossing = [(row * cols + col1 - 1, row * cols + col1) for row in range(row0, row1)]
+        else: # one above the other: last row of cluster, first of other
+            crossing = [((row1 - 1) * cols + col, row1 * cols + col) for col in range(col0, col1)]
+
+        pairs = []
+        run = []
+        for pair in crossing + [None]:
+            if pair is not None and not walls[pair[0]] and not walls[pair[1]]:
+                run.append(pair)
+                continue
+            if len(run) >= WIDE_ENTRANCE:
+                pairs += [run[0], run[-1]]
+            elif run:
+                pairs.append(run[len(run) // 2])
+            run = []
+
+        self.borders[cluster, other] = pairs
+        for inside, outside in pairs:
+            self.partners.setdefault(inside, []).append(outside)
+            self.partners.setdefault(outside, []).append(inside)
+            self.nodes[cluster].add(inside)
+            self.nodes[other].add(outside)
+
+    def _remove_border(self, cluster, other):
+        partners = self.partners
+        for pair in self.borders.pop((cluster, other)):
+            for cell, across, owner in ((pair[0], pair[1], cluster), (pair[1], pair[0], other)):
+                partners[cell].remove(across)
+                if not partners[cell]:
+                    del partners[cell]
+                    self.nodes[owner].discard(cell)
+                    self.edges.pop(cell, None)
+
+    # Link the entrances of a cluster by their in-cluster path costs
+    def _build_edges(self, cluster):
+        nodes = self.nodes[cluster]
+        bounds = self.bounds(cluster)
+        for node in nodes:
+            dist, _, _ = local_search(self.terrain, node, bounds, nodes)
+            self.edges[node] = [(other, dist[other]) for other in nodes
+                                if other != node and other in dist]
+
+    # Tell the graph that the wall or weight of these cells changed: rebuild
+    # the borders of their clusters and the links of every cluster involved
+    def update(self, cells):
+        touched = {self.cluster_of(cell) for cell in cells}
+        borders = set()
+        for cluster in touched:
+            borders.update((cluster, other) for other in self._next_clusters(cluster))
+            crow, ccol = divmod(cluster, self.cluster_cols)
+            if ccol > 0:
+                borders.add((cluster - 1, cluster))
+            if crow > 0:
+                borders.add((cluster - self.cluster_cols, cluster))
+        for border in borders:
+            self._remove_border(*border)
+            self._build_border(*border)
+        rebuild = touched.union(*borders)
+        for cluster in rebuild:
+            for node in self.nodes[cluster]:
+                self.edges.pop(node, None)
+            self._build_edges(cluster)
+
+    # Path query as a step generator (like search.steps): yields (event, cell)
+    # for the entrances the abstract search opens and expands, then the path,
+    # and returns the SearchResult. expansions counts abstract nodes and the
+    # cells expanded by the cluster-local searches.
+    def steps(self, start, end, probe=None, events=True):
+        start_time = time.perf_counter()
+        terrain = self.terrain
+        cols = terrain.cols
+        weights = terrain.weights
+        edges = self.edges
+        partners = self.partners
+        push = heapq.heappush
+        pop = heapq.heappop
+        if probe is not None:
+            push = probe.timed("heap", push)
+            pop = probe.timed("heap", pop)
+            mark = probe.begin()
+
+        # Connect start and end to the entrances of their clusters
+        start_cluster = self.cluster_of(start)
+        end_cluster = self.cluster_of(end)
+        targets = set(self.nodes[start_cluster])
+        if start_cluster == end_cluster:
+            targets.add(end)
+        from_start, _, expansions = local_search(terrain, start, self.bounds(start_cluster), targets)
+        first = [(cell, from_start[cell]) for cell in targets if cell in from_start]
+        to_end, _, settled = local_search(terrain, end, self.bounds(end_cluster),
+                                          self.nodes[end_cluster], backward=True)
+        expansions += settled
+
+        # A* over the abstract graph
+        g_score = {start: 0}
+        came_from = {}
+        heap = [(heuristic(start, end, cols), 0, start)]
+        count = 0
+        closed = set()
+        max_open = 1
+        found = start == end
+        while heap and not found:
+            _, _, current = pop(heap)
+            if current in closed:
+                continue
+            if current == end:
+                found = True
+                break
+            closed.add(current)
+            expansions += 1
+            if events:
+                yield CLOSED, current
+
+            links = list(edges.get(current, ()))
+            links += [(across, weights[current]) for across in partners.get(current, ())]
+            if current == start:
+                links += first
+            if current in to_end:
+                links.append((end, to_end[current]))
+            for neighbor, cost in links:
+                new_g = g_score[current] + cost
+                if new_g < g_score.get(neighbor, float("inf")):
+                    g_score[neighbor] = new_g
+                    came_from[neighbor] = current
+                    count += 1
+                    push(heap, (new_g + heuristic(neighbor, end, cols), count, neighbor))
+                    if events:
+                        yield OPEN, neighbor
+            if len(heap) > max_open:
+                max_open = len(heap)
+
+        # Refine the abstract path into cells
+        cells = [start]
+        if found and start != end:
+            waypoints = [end]
+            while waypoints[-1] != start:
+                waypoints.append(came_from[waypoints[-1]])
+            waypoints.reverse()
+            for source, target in zip(waypoints, waypoints[1:]):
+                if self.cluster_of(source) != self.cluster_of(target):
+                    cells.append(target) # across a border
+                    continue
+                _, links, settled = local_search(terrain, source, self.bounds(self.cluster_of(source)),
+                                                 goal=target)
+                expansions += settled
+                segment = [target]
+                while segment[-1] != source:
+                    segment.append(links[segment[-1]])
+                cells += reversed(segment[:-1])
+
+        # One chain from start to end; where segments cross, cut out the loop
+        chain = []
+        position = {}
+        for cell in cells:
+            if cell in position:
+                for dropped in chain[position[cell] + 1:]:
+                    del position[dropped]
+                del chain[position[cell] + 1:]
+                continue
+            position[cell] = len(chain)
+            chain.append(cell)
+        path_from = dict(zip(chain[1:], chain))
+
+        if probe is not None:
+            probe.end("expansion", mark)
+        return (yield from finish("HPA*", terrain, path_from, start, end, found, expansions,
+                      start_time, events, probe, count + 1, 0, count, max_open))
+
+    # Run a query to the end and return its SearchResult
+    def plan(self, start, end, probe=None):
+        stepper = self.steps(start, end, probe, events=False)
+        while True:
+            try:
+                next(stepper)
+            except StopIteration as stop:
+                return stop.value
@@ -0,0 +1,143 @@
+import time # Import time for time-related functions
+import heapq # Import heapq for priority queue implementation
+
+from search import OPEN, CLOSED, finish, heuristic
+
+# Incremental replanning with Lifelong Planning A* (LPA*). The planner keeps
+# its search state (g and rhs per cell) between queries on the same start and
+# end. After terrain edits, update(cells) marks the edited cells and only the
+# part of the search they affect is repaired on the next plan.
+#
+# Costs follow the search core: moving out of a cell costs its weight, and
+# walls cannot be entered or left. g is a cell's settled cost from start,
+# rhs the one-step lookahead min(g[p] + weight[p]) over its open neighbors p.
+
+class LPAStar:
+    __slots__ = ("terrain", "start", "end", "g", "rhs", "queue", "count", "reported")
+
+    def __init__(self, terrain, start, end):
+        self.terrain = terrain  # shared with the caller; edits are seen through update()
+        self.start = start
+        self.end = end
+        self.g = [float("inf")] * len(terrain)
+        self.rhs = [float("inf")] * len(terrain)
+        self.rhs[start] = 0
+        self.queue = []         # (k1, k2, count, cell); outdated entries are skipped
+        self.count = 0
+        self.reported = 0       # count when the last repair finished
+        self._push(start)
+
+    # Priority of a cell: (min(g, rhs) + h, min(g, rhs))
+    def _key(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        return best + heuristic(cell, self.end, self.terrain.cols), best
+
+    def _push(self, cell):
+        k1, k2 = self._key(cell)
+        self.count += 1
+        heapq.heappush(self.queue, (k1, k2, self.count, cell))
+
+    # Recompute rhs of a cell and queue it if it became inconsistent;
+    # returns True if it was queued
+    def _update_cell(self, cell):
+        terrain = self.terrain
+        if cell != self.start:
+            if terrain.walls[cell]:
+                self.rhs[cell] = float("inf")
+            else:
+                g = self.g
+                weights = terrain.weights
+                self.rhs[cell] = min((g[p] + weights[p] for p in terrain.neighbors(cell)),
+                                     default=float("inf"))
+        if self.g[cell] != self.rhs[cell]:
+            self._push(cell)
+            return True
+        return False
+
+    # Tell the planner that the wall or weight of these cells changed
+    def update(self, cells):
+        neighbors = self.terrain.neighbors
+        for cell in cells:
+            self._update_cell(cell)
+            for neighbor in neighbors(cell):
+                self._update_cell(neighbor)
+
+    # Repair the search as a step generator (like search.steps): yields
+    # (event, cell) for the cells this repair touches and returns the
+    # SearchResult, whose expansions count only this repair's work and whose
+    # pushes include those update() queued for it since the last repair
+    def steps(self, probe=None, events=True):
+        start_time = time.perf_counter()
+        terrain = self.terrain
+        neighbors = terrain.neighbors
+        g = self.g
+        rhs = self.rhs
+        queue = self.queue
+        end = self.end
+        key = self._key
+        update_cell = self._update_cell
+        pop = heapq.heappop
+        if probe is not None:
+            pop = probe.timed("heap", pop)
+            mark = probe.begin()
+        expansions = 0
+        stale_pops = 0
+        relaxations = 0
+        max_open = len(queue)
+
+        while queue:
+            k1, k2, _, cell = queue[0]
+            if (k1, k2) >= key(end) and g[end] == rhs[end]:
+                break
+            pop(queue)
+            if g[cell] == rhs[cell] or (k1, k2) != key(cell):
+                stale_pops += 1 # consistent again or queued with a newer key
+                continue
+
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]   # overconsistent: settle it
+            else:
+                g[cell] = float("inf") # underconsistent: raise it and retry
+                update_cell(cell)
+            for neighbor in neighbors(cell):
+                relaxations += 1
+                if update_cell(neighbor) and events:
+                    yield OPEN, neighbor
+
+            expansions += 1
+            if len(queue) > max_open:
+                max_open = len(queue)
+            if events:
+                yield CLOSED, cell
+
+        if probe is not None:
+            probe.end("expansion", mark)
+        pushes = self.count - self.reported
+        self.reported = self.count
+        found = g[end] != float("inf")
+        came_from = self._came_from() if found else {}
+        return (yield from finish("LPA*", terrain, came_from, self.start, end, found, expansions,
+                      start_time, events, probe, pushes, stale_pops, relaxations,
+                      max_open))
+
+    # Walk back from end along cheapest predecessors
+    def _came_from(self):
+        terrain = self.terrain
+        weights = terrain.weights
+        g = self.g
+        came_from = {}
+        cell = self.end
+        while cell != self.start:
+            previous = min(terrain.neighbors(cell), key=lambda p: g[p] + weights[p])
+            came_from[cell] = previous
+            cell = previous
+        return came_from
+
+    # Repair the search and return its SearchResult
+    def plan(self, probe=None):
+        stepper = self.steps(probe, events=False)
+        while True:
+            try:
+                next(stepper)
+            except StopIteration as stop:
+                return stop.value
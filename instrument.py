@@ -0,0 +1,69 @@
+from time import perf_counter_ns # Import perf_counter_ns for phase timings
+
+# Optional instrumentation for the search core. Pass a Probe as probe= to a
+# search to collect per-phase timings (nanoseconds) and counters; searches
+# run without one pay nothing for it.
+
+# Phases reported by the searches
+PHASES = ("neighbors", "heap", "expansion", "path", "render")
+
+# Counters reported by the searches
+COUNTERS = ("pushes", "stale_pops", "relaxations")
+
+class Probe:
+    __slots__ = ("timings", "counters", "_inner", "_suspended")
+
+    def __init__(self):
+        self.timings = dict.fromkeys(PHASES, 0) # phase -> exclusive ns
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._inner = 0 # ns spent in finished sections, used to make timings exclusive
+        self._suspended = None # (start ns, _inner) while a stepped search is suspended
+
+    # Start timing a section; pass the returned mark to end()
+    def begin(self):
+        return perf_counter_ns(), self._inner
+
+    # Finish a section. Time spent in sections nested inside it is charged to
+    # those sections only, so phases never double count.
+    def end(self, phase, mark):
+        start, inner_before = mark
+        total = perf_counter_ns() - start
+        self.timings[phase] = self.timings.get(phase, 0) + total - (self._inner - inner_before)
+        self._inner = inner_before + total
+
+    # Wrap fn so every call is timed as phase
+    def timed(self, phase, fn):
+        begin = self.begin
+        end = self.end
+
+        def wrapper(*args):
+            mark = begin()
+            try:
+                return fn(*args)
+            finally:
+                end(phase, mark)
+        return wrapper
+
+    # Leave the time between suspend() and resume() out of every open section.
+    # Used while a stepped search waits for its consumer to ask for more.
+    def suspend(self):
+        self._suspended = (perf_counter_ns(), self._inner)
+
+    def resume(self):
+        if self._suspended is not None:
+            start, inner_before = self._suspended
+            self._inner = inner_before + perf_counter_ns() - start
+            self._suspended = None
+
+    # Charge ns measured elsewhere to phase
+    def add(self, phase, ns):
+        self.timings[phase] = self.timings.get(phase, 0) + ns
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    # Timings in milliseconds plus counters, for reports
+    def report(self):
+        report = {f"{phase}_ms": ns / 1e6 for phase, ns in self.timings.items()}
+        report.update(self.counters)
+        return report
@@ -1,33 +1,60 @@
+import argparse
+import os
 import pygame
-from BFS import BFS_algorithm
-from Dijkstra import dijkstra_algorithm
-from A_Star import A_Star_Algorithm
+import time
+import tracing
+from concurrent.futures import Future
+from cache import QueryCache
+from incremental import LPAStar
+from hpa import HPAStar
+from instrument import Probe
+from mapio import load_map, save_map
+from search import ALGORITHMS, LABELS, stepwise
+from wavefront import HAVE_NUMPY
+from animation import Animation, Track, DEFAULT_SPEED, speed_name, change_speed
 from grid import (
-    Box, make_grid, expanded_and_path,
+    Box, Terrain, overlay_of, make_painter, clear_search,
     ROWS, COLS,
     WHITE, BLACK, GREY
 )
-
-pygame.init()
+from panel import PanelView
 
 # Base layout dimensions
 BASE_PANEL_WIDTH = 400
 BASE_PANEL_HEIGHT = 500
-BASE_LABEL_HEIGHT = 50
+BASE_LEGEND_HEIGHT = 110 # mode line and key help, above the panel labels
+BASE_LABEL_HEIGHT = 40
 BASE_BOTTOM_HEIGHT = 70
 BASE_SPACING = 20
 
-ASPECT_RATIO = 2.0  # width = 2 * height
+BASE_HEIGHT = 720   # window height the base dimensions are for
 
 # Mutable dimensions (update on resize)
+PANELS = 3 # number of algorithm panels, side by side
 PANEL_WIDTH = BASE_PANEL_WIDTH
 PANEL_HEIGHT = BASE_PANEL_HEIGHT
+LEGEND_HEIGHT = BASE_LEGEND_HEIGHT
 LABEL_HEIGHT = BASE_LABEL_HEIGHT
 BOTTOM_STATS_HEIGHT = BASE_BOTTOM_HEIGHT
 PANEL_SPACING = BASE_SPACING
+SCALE = 1.0
+
+screen = None # Display surface, created in main()
+FONTS = {}    # Fonts by role, created once per resize by load_fonts()
+
+# Searches that keep state between runs (a repairable search, a cluster
+# graph); they run in this process and are fed the cells each edit changes
+KEPT = ("lpastar", "hpa")
+
+# Traces kept for replaying runs on an unchanged grid, by size of their events
+# (a search on a 2000x2000 map can record millions of events)
+CACHE_BYTES = 64 << 20
+
+# Panels shown when --algorithms is not given
+DEFAULT_ALGORITHMS = ("bfs", "dijkstra", "astar")
 
-screen = pygame.display.set_mode((1240, 620), pygame.RESIZABLE)
-pygame.display.set_caption("BFS | Dijkstra | A* Comparison")
+# Map file used by S and O when --map is not given
+DEFAULT_MAP = os.path.join("maps", "saved.grid")
 
 # Colors
 WHITE = (255, 255, 255)
@@ -35,264 +62,439 @@ GREY = (128, 128, 128)
 BLACK = (0, 0, 0)
 
 
+# Create the fonts for the current window scale
+def load_fonts():
+    def font(size, bold=False):
+        return pygame.font.SysFont("Arial", max(8, int(size * SCALE)), bold=bold)
+
+    FONTS["label"] = font(28, bold=True)
+    FONTS["stats"] = font(18)
+    FONTS["probe"] = font(16)
+    FONTS["mode"] = font(20)
+    FONTS["legend"] = font(16)
+
+# Window width for the panels at the base height
+def base_width():
+    return PANELS * BASE_PANEL_WIDTH + (PANELS - 1) * BASE_SPACING
+
 # Handle resizing and maintain aspect ratio
 def handle_resize(event_w, event_h):
-    global PANEL_WIDTH, PANEL_HEIGHT, LABEL_HEIGHT, BOTTOM_STATS_HEIGHT, PANEL_SPACING
+    global PANEL_WIDTH, PANEL_HEIGHT, LEGEND_HEIGHT, LABEL_HEIGHT, BOTTOM_STATS_HEIGHT, PANEL_SPACING
+    global SCALE, screen
 
     new_h = event_h
-    new_w = int(new_h * ASPECT_RATIO)
+    new_w = int(new_h * base_width() / BASE_HEIGHT)
 
-    pygame.display.set_mode((new_w, new_h), pygame.RESIZABLE)
+    screen = pygame.display.set_mode((new_w, new_h), pygame.RESIZABLE)
 
-    scale = new_h / 620
+    scale = new_h / BASE_HEIGHT
+    SCALE = scale
 
     PANEL_WIDTH = int(BASE_PANEL_WIDTH * scale)
     PANEL_HEIGHT = int(BASE_PANEL_HEIGHT * scale)
+    LEGEND_HEIGHT = int(BASE_LEGEND_HEIGHT * scale)
     LABEL_HEIGHT = int(BASE_LABEL_HEIGHT * scale)
     BOTTOM_STATS_HEIGHT = int(BASE_BOTTOM_HEIGHT * scale)
     PANEL_SPACING = int(BASE_SPACING * scale)
+    load_fonts()
 
 # X offset for each panel
 def panel_x(panel_index):
     return panel_index * (PANEL_WIDTH + PANEL_SPACING)
 
 
-# Draw a centered letterboxed grid
-def draw_panel(grid, panel_index):
-    x_offset = panel_x(panel_index)
-
-    # Compute cell dimensions
-    box_w = PANEL_WIDTH // COLS
-    box_h = PANEL_HEIGHT // ROWS
-    cell = min(box_w, box_h)
-
-    used_w = cell * COLS
-    used_h = cell * ROWS
-
-    # Letterbox padding
-    pad_x = x_offset + (PANEL_WIDTH - used_w) // 2
-    pad_y = LABEL_HEIGHT + (PANEL_HEIGHT - used_h) // 2
-
-    # Draw cells
-    for row in grid:
-        for box in row:
-            rect = pygame.Rect(
-                pad_x + box.col * cell,
-                pad_y + box.row * cell,
-                cell, cell
-            )
-            pygame.draw.rect(screen, box.color, rect)
-
-    # Draw grid lines
-    for i in range(ROWS + 1):
-        pygame.draw.line(
-            screen, GREY,
-            (pad_x, pad_y + i * cell),
-            (pad_x + used_w, pad_y + i * cell)
-        )
+# Top of the panels' grids, below the legend and the labels
+def panels_top():
+    return LEGEND_HEIGHT + LABEL_HEIGHT
 
-    for j in range(COLS + 1):
-        pygame.draw.line(
-            screen, GREY,
-            (pad_x + j * cell, pad_y),
-            (pad_x + j * cell, pad_y + used_h)
-        )
+# Area of the window given to a panel's grid
+def panel_area(panel_index):
+    return pygame.Rect(panel_x(panel_index), panels_top(), PANEL_WIDTH, PANEL_HEIGHT)
 
 # Draw panel labels
-def draw_labels():
-    font = pygame.font.SysFont("Arial", 28, bold=True)
-    labels = ["BFS", "Dijkstra", "A*"]
+def draw_labels(algorithms):
+    font = FONTS["label"]
+    labels = [LABELS.get(name, name) if name else "" for name in algorithms]
 
     for i, text in enumerate(labels):
         center_x = panel_x(i) + PANEL_WIDTH // 2
         surf = font.render(text, True, BLACK)
-        rect = surf.get_rect(center=(center_x, LABEL_HEIGHT // 0.75))
+        rect = surf.get_rect(center=(center_x, LEGEND_HEIGHT + LABEL_HEIGHT // 2))
         screen.blit(surf, rect)
 
-# Draw stats text
-def draw_stats(timers, expanded, path_lengths, path_costs):
-    font = pygame.font.SysFont("Arial", 18)
-    labels = ["BFS", "Dijkstra", "A*"]
-    spacing = 20
+# Draw stats text from each panel's SearchResult (None before a run ends)
+def draw_stats(results):
+    font = FONTS["stats"]
+    spacing = int(20 * SCALE)
 
-    for i, label in enumerate(labels):
+    for i, result in enumerate(results):
         center_x = panel_x(i) + PANEL_WIDTH // 2
-        y_base = LABEL_HEIGHT + PANEL_HEIGHT - 20
-
-        # Time
-        if timers[i] is not None:
-            t_string = f"Time: {timers[i]:.3f}s"
-            t_color = BLACK
-        else:
-            t_string = "Time: --"
-            t_color = GREY
-        surf = font.render(t_string, True, t_color)
-        rect = surf.get_rect(center=(center_x, y_base))
-        screen.blit(surf, rect)
+        y_base = panels_top() + PANEL_HEIGHT - int(20 * SCALE)
+        found = result is not None and result.found
+        lines = (
+            # (text, shown): lines not shown are greyed out with "--"
+            (f"Time: {result.elapsed:.3f}s" if found else "Time: --", found),
+            (f"Expanded: {result.expansions} (open max {result.max_open})" if result is not None
+             else "Expanded: --", result is not None),
+            (f"Path Length: {result.path_length}" if found else "Path Length: --", found),
+            (f"Cost: {result.path_cost}" if found else "Cost: --", found),
+        )
+        for row, (text, shown) in enumerate(lines):
+            surf = font.render(text, True, BLACK if shown else GREY)
+            rect = surf.get_rect(center=(center_x, y_base + spacing * row))
+            screen.blit(surf, rect)
 
-        # Expanded
-        if expanded[i] is not None:
-            e_string = f"Expanded: {expanded[i]}"
-            e_color = BLACK
-        else:
-            e_string = "Expanded: --"
-            e_color = GREY
-        surf = font.render(e_string, True, e_color)
-        rect = surf.get_rect(center=(center_x, y_base + spacing))
-        screen.blit(surf, rect)
+# Draw instrumentation (phase timings and counters) in place of the stats
+def draw_probe_stats(probes):
+    font = FONTS["probe"]
+    spacing = int(20 * SCALE)
 
-        # Path Length
-        if path_lengths[i] is not None:
-            p_string = f"Path Length: {path_lengths[i]}"
-            p_color = BLACK
-        else:
-            p_string = "Path Length: --"
-            p_color = GREY
-        surf = font.render(p_string, True, p_color)
-        rect = surf.get_rect(center=(center_x, y_base + spacing * 2))
-        screen.blit(surf, rect)
+    for i, probe in enumerate(probes):
+        center_x = panel_x(i) + PANEL_WIDTH // 2
+        y_base = panels_top() + PANEL_HEIGHT - int(20 * SCALE)
 
-        # Path Cost
-        if path_costs[i] is not None:
-            c_string = f"Cost: {path_costs[i]}"
-            c_color = BLACK
+        if probe is None:
+            lines = ["Instrumentation: --"]
+            color = GREY
         else:
-            c_string = "Cost: --"
-            c_color = GREY
-
-        surf = font.render(c_string, True, c_color)
-        rect = surf.get_rect(center=(center_x, y_base + spacing * 3))
-        screen.blit(surf, rect)
+            ms = {phase: ns / 1e6 for phase, ns in probe.timings.items()}
+            counters = probe.counters
+            lines = [
+                f"Neighbors: {ms['neighbors']:.2f}ms  Heap: {ms['heap']:.2f}ms",
+                f"Expand: {ms['expansion']:.2f}ms  Path: {ms['path']:.2f}ms",
+                f"Render: {ms['render']:.1f}ms",
+                f"Push: {counters['pushes']}  Stale: {counters['stale_pops']}  "
+                f"Relax: {counters['relaxations']}",
+            ]
+            color = BLACK
+
+        for n, line in enumerate(lines):
+            surf = font.render(line, True, color)
+            rect = surf.get_rect(center=(center_x, y_base + spacing * n))
+            screen.blit(surf, rect)
 
 # Draw legend with current paint mode and keybinds
-def draw_legend(paint_mode):
-    font_big = pygame.font.SysFont("Arial", 20)
-    font_small = pygame.font.SysFont("Arial", 16)
-
-    # Mode line
-    mode_text = f"Mode: {paint_mode.capitalize()}"
+def draw_legend(paint_mode, speed, cache, replay=None):
+    font_big = FONTS["mode"]
+    font_small = FONTS["legend"]
+
+    # Mode line; replay is the replayed share of the first trace, in replay mode
+    if replay is not None:
+        mode_text = f"Replay: {replay:.0%}    Speed: {speed_name(speed)}"
+    else:
+        mode_text = (f"Mode: {paint_mode.capitalize()}    Speed: {speed_name(speed)}    "
+                     f"Cache: {cache.hits} hits / {cache.misses} misses")
     surf = font_big.render(mode_text, True, BLACK)
-    screen.blit(surf, (10, 5))
+    screen.blit(surf, (10, int(5 * SCALE)))
 
     # Legend lines
-    legend = [
-        "Q: Wall    W: Mud    E: Water",
-        "R: Reset full grid",
-        "Space: Run algorithms"
-    ]
-
-    y = 30
+    if replay is not None:
+        legend = [
+            "Space: Play / pause    -/=: Speed",
+            "Left/Right: Seek back / forward 10%",
+        ]
+    else:
+        legend = [
+            "Q: Wall    W: Mud    E: Water    -/=: Speed",
+            "R: Reset full grid    S: Save map    O: Open map",
+            "Space: Run algorithms    V: BFS/Wavefront    H: A*/HPA*",
+            "I: Toggle instrumentation    J: A*/JPS    B: Bidirectional    L: A*/LPA*"
+        ]
+
+    y = int(30 * SCALE)
     for line in legend:
         surf = font_small.render(line, True, BLACK)
         screen.blit(surf, (10, y))
-        y += 20
-
-# Map mouse click into centered grid
-def get_center_grid_pos(mx, my):
-    panel_index = 1
-    x_offset = panel_x(panel_index)
-
-    cell = min(PANEL_WIDTH // COLS, PANEL_HEIGHT // ROWS)
-    used_w = cell * COLS
-    used_h = cell * ROWS
-
-    pad_x = x_offset + (PANEL_WIDTH - used_w) // 2
-    pad_y = LABEL_HEIGHT + (PANEL_HEIGHT - used_h) // 2
-
-    # Must click inside the grid area
-    if not (pad_x <= mx < pad_x + used_w and
-            pad_y <= my < pad_y + used_h):
-        return None
-
-    local_x = mx - pad_x
-    local_y = my - pad_y
-
-    col = local_x // cell
-    row = local_y // cell
-
-    if 0 <= row < ROWS and 0 <= col < COLS:
-        return row, col
-    return None
+        y += int(20 * SCALE)
 
-# Apply edits (set start, end, wall, reset) to all three grids
-def apply_edit(row, col, button, start, end, g1, g2, g3, paint_mode):
-    boxes = [g1[row][col], g2[row][col], g3[row][col]]
+# Apply an edit (set start, end, wall, reset) to the panels' grids. They share
+# one terrain, so the edit is made once and only the cell's state is copied to
+# the other panels. Returns the new start and end and the cells whose wall or
+# weight changed, so that incremental planners can repair their searches.
+def apply_edit(row, col, button, start, end, grids, paint_mode):
+    box = grids[0][row][col]
+    before = (box.is_wall, box.weight)
 
     if button == 1:  # left click
         # Set start
-        if start is None and not boxes[0].is_wall:
-            for b in boxes:
-                b.set_start()
-            return (row, col), end
+        if start is None and not box.is_wall:
+            box.set_start()
+            start = (row, col)
 
         # Set end
-        if end is None and not boxes[0].is_wall and (row, col) != start:
-            for b in boxes:
-                b.set_end()
-            return start, (row, col)
-        
-        if (row, col) == start or (row, col) == end:
-            return start, end
+        elif end is None and not box.is_wall and (row, col) != start:
+            box.set_end()
+            end = (row, col)
+
+        elif (row, col) == start or (row, col) == end:
+            return start, end, []
 
         # Set weighted mud tile
-        if paint_mode == "mud" and not g1[row][col].is_wall:
-            for b in [g1[row][col], g2[row][col], g3[row][col]]:
-                b.set_mud()
-            return start, end
+        elif paint_mode == "mud" and not box.is_wall:
+            box.set_mud()
 
         # Set weighted water tile
-        if paint_mode == "water" and not g1[row][col].is_wall:
-            for b in [g1[row][col], g2[row][col], g3[row][col]]:
-                b.set_water()
-            return start, end
+        elif paint_mode == "water" and not box.is_wall:
+            box.set_water()
 
         # Set wall
-        if paint_mode == "wall":
-            for b in boxes:
-                b.set_wall()
+        elif paint_mode == "wall":
+            box.set_wall()
+
+        else:
+            return start, end, []
 
     elif button == 3:  # right
-        for b in boxes:
-            b.reset()
+        box.reset()
 
         if start == (row, col):
             start = None
         if end == (row, col):
             end = None
 
-    return start, end
+    state = grids[0].states[box.index]
+    for g in grids[1:]:
+        g.states[box.index] = state
+
+    changed = [] if (box.is_wall, box.weight) == before else [(row, col)]
+    return start, end, changed
+
+# One grid per panel over a shared terrain, e.g. a loaded map, with its start
+# and end marked (returned as (row, col), or None if the map has none or
+# they are walls)
+def grids_of_map(terrain, start, end, panels):
+    grids = [overlay_of(terrain) for _ in range(panels)]
+    points = []
+    for cell, mark in ((start, Box.set_start), (end, Box.set_end)):
+        if cell is None or terrain.walls[cell]:
+            points.append(None)
+            continue
+        for g in grids:
+            mark(g.box(cell))
+        points.append(terrain.coords(cell))
+    return grids, points[0], points[1]
 
 # Main function to run the visualization
-def main(): 
+def main(argv=None):
+    global screen, PANELS
+    parser = argparse.ArgumentParser(description="Compare BFS, Dijkstra and A* side by side.")
+    parser.add_argument("--algorithms", nargs="+", default=list(DEFAULT_ALGORITHMS),
+                        choices=sorted(list(ALGORITHMS) + list(KEPT)), metavar="NAME",
+                        help="one panel per algorithm, in order (default: %(default)s)")
+    parser.add_argument("--rows", type=int, default=ROWS, help="grid rows (default: %(default)s)")
+    parser.add_argument("--cols", type=int, default=COLS, help="grid columns (default: %(default)s)")
+    parser.add_argument("--map", help="map file to open at start and for S/O: binary (.grid) or "
+                                      "MovingAI (.map, start and end from the .scen next to it)")
+    parser.add_argument("--replay", nargs="+", metavar="TRACE",
+                        help="play trace files (see tracing.py) recorded on --map instead of "
+                             "searching, one panel each")
+    args = parser.parse_args(argv)
+    if args.replay and args.map is None:
+        parser.error("--replay needs the --map the traces were recorded on")
+    if "wavefront" in args.algorithms and not HAVE_NUMPY:
+        parser.error("Wavefront BFS needs NumPy: pip install numpy")
+    rows, cols = args.rows, args.cols
+    map_path = args.map or DEFAULT_MAP
+
+    # Panels and the algorithm each shows; the key swaps below act on the
+    # panels by the algorithm they started with
+    algorithms = list(args.algorithms)
+    replays = None # trace files played instead of searching (--replay)
+    if args.replay:
+        try:
+            replays = [tracing.TraceFile(path) for path in args.replay]
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+        algorithms = [trace.algorithm for trace in replays]
+    homes = list(algorithms)
+
+    # The --map file; one that does not exist yet starts an empty grid that S
+    # saves to it (replays need the map they were recorded on)
+    loaded = None
+    if args.map is not None:
+        try:
+            loaded = load_map(args.map)
+        except FileNotFoundError:
+            if replays is not None:
+                parser.error(f"{args.map} does not exist")
+            print(f"{args.map} does not exist yet; S saves the grid there")
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+    PANELS = len(algorithms)
+
+    pygame.init()
+    screen = pygame.display.set_mode((base_width(), BASE_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption(" | ".join(LABELS.get(name, name) for name in algorithms) + " Comparison")
+    load_fonts()
+
     running = True
 
-    bfs_grid = make_grid()
-    dij_grid = make_grid()
-    astar_grid = make_grid()
+    # One terrain shared by every panel; each panel only adds its own colors
+    terrain = Terrain(rows, cols)
+    grids = [overlay_of(terrain) for _ in algorithms]
 
     start = None
     end = None
-    
-    # Store stats for each algorithm [BFS, Dijkstra, A*]
-    timers = [None, None, None]
-    expanded = [None, None, None]
-    path_lengths = [None, None, None]
-    path_costs = [None, None, None]
+    if loaded is not None:
+        terrain, s, e = loaded
+        rows, cols = terrain.rows, terrain.cols
+        if replays is not None:
+            try:
+                for trace in replays:
+                    trace.check(terrain)
+            except ValueError as error:
+                parser.error(str(error))
+            s, e = replays[0].start, replays[0].end
+        grids, start, end = grids_of_map(terrain, s, e, PANELS)
+
+    # Store stats for each panel
+    results = [None] * PANELS  # SearchResult of the last finished run
+    probes = [None] * PANELS   # instrumentation of the last run
+    planners = [None] * PANELS # LPAStar or HPAStar kept between runs of a KEPT panel
+    cache = QueryCache(max_bytes=CACHE_BYTES) # earlier traces, reused on an unchanged grid
+    instrument = False         # collect and show instrumentation
 
     paint_mode = "wall"   # default drawing mode
+    speed = DEFAULT_SPEED # animation speed
+    animation = None      # trace replays, stepped a frame at a time
+    paused = False        # replay mode: animation kept but not advanced
+    pending = None        # futures of traces still being recorded
+    clock = pygame.time.Clock()
+
+    views = [PanelView() for _ in grids]
+    full_redraw = True  # repaint everything (first frame and after resizing)
+    shown_header = None # legend contents currently on screen
+    shown_footer = None # stats contents currently on screen
+
+    # Stats below the panels, or instrumentation when it is switched on
+    def draw_bottom():
+        if instrument:
+            draw_probe_stats(probes)
+        else:
+            draw_stats(results)
+
+    # What the stats area shows; it is only repainted when this changes
+    def footer_contents():
+        if instrument:
+            return tuple(None if p is None else (tuple(p.timings.values()), tuple(p.counters.values()))
+                         for p in probes)
+        return tuple(results)
+
+    # Replay mode: repaint each panel up to its trace's event number in
+    # positions, then replay the rest from there
+    def seek_replays(positions):
+        tracks = []
+        for i, trace in enumerate(replays):
+            clear_search(grids[i])
+            results[i] = None
+            paint = make_painter(grids[i])
+            for event, cell in trace.events(0, positions[i]):
+                paint(event, cell)
+            tracks.append(Track(trace.replay(positions[i]), paint))
+        return Animation(tracks, speed)
+
+    # Trace of a KEPT panel's search, run in this process with the planner it
+    # keeps between runs: LPA* repairs its search (a new start or end starts
+    # over), HPA* reuses its cluster graph, which must already be built
+    def record_kept(i, s, e):
+        planner = planners[i]
+        probe = Probe() if instrument else None
+        if algorithms[i] == "hpa":
+            stepper = planner.steps(s, e, probe)
+        else:
+            if planner is None or (planner.start, planner.end) != (s, e):
+                planner = planners[i] = LPAStar(terrain, s, e)
+            stepper = planner.steps(probe)
+        return tracing.record_steps(algorithms[i], stepwise(stepper, probe), probe)
+
+    # Repaint the area above the grids (legend and labels) or below them (stats)
+    def draw_region(rect, draw):
+        screen.set_clip(rect)
+        screen.fill(WHITE, rect)
+        draw()
+        screen.set_clip(None)
+        return rect
 
     while running:
-        screen.fill(WHITE)
-        draw_labels()
-        draw_legend(paint_mode)
-
-        draw_panel(bfs_grid, 0)
-        draw_panel(dij_grid, 1)
-        draw_panel(astar_grid, 2)
-        
-        draw_stats(timers, expanded, path_lengths, path_costs)
-
-        pygame.display.update()
+        # Once every trace has been recorded, replay them side by side
+        if pending is not None and all(future.done() for future in pending):
+            traces = []
+            s, e = terrain.index(*start), terrain.index(*end)
+            for i, future in enumerate(pending):
+                try:
+                    done = future.result()
+                except (OSError, RuntimeError):
+                    # No usable process pool here: build the graph or record this
+                    # panel's search in this process instead (kept searches and
+                    # cached traces never fail)
+                    tracing.shutdown_pool()
+                    if algorithms[i] == "hpa":
+                        done = HPAStar(terrain)
+                    else:
+                        done = tracing.record(algorithms[i], terrain, s, e, instrument)
+                if isinstance(done, HPAStar):
+                    # A cluster graph built in a worker, over its copy of the
+                    # terrain: keep it on the shared one and search it here
+                    done.terrain = terrain
+                    planners[i] = done
+                    done = record_kept(i, s, e)
+                traces.append(done)
+            tracks = []
+            for i, trace in enumerate(traces):
+                if not instrument and algorithms[i] not in KEPT:
+                    cache.put(terrain, algorithms[i], terrain.index(*start), terrain.index(*end),
+                              trace, trace.result)
+                probes[i] = trace.probe
+                tracks.append(Track(trace.replay(), make_painter(grids[i])))
+            animation = Animation(tracks, speed)
+            pending = None
+
+        # Step the replays within this frame's budget
+        animated = animation is not None and not paused
+        if animated:
+            animation.advance()
+            for i, track in enumerate(animation.tracks):
+                if track.done and results[i] is None:
+                    results[i] = track.result
+            if animation.done:
+                animation = None
+
+        render_start = time.perf_counter_ns()
+        if full_redraw:
+            screen.fill(WHITE)
+            for i, view in enumerate(views):
+                view.layout(panel_area(i), rows, cols)
+            shown_header = shown_footer = None
+        dirty = []
+        for view, g in zip(views, grids):
+            dirty.extend(view.draw_changes(screen, g))
+
+        width, height = screen.get_size()
+        replay = None if replays is None else replays[0].position / max(len(replays[0]), 1)
+        header = (paint_mode, speed, tuple(algorithms), cache.hits, cache.misses, replay)
+        if header != shown_header:
+            top = min(view.top for view in views)
+            dirty.append(draw_region(pygame.Rect(0, 0, width, top),
+                                     lambda: (draw_legend(paint_mode, speed, cache, replay), draw_labels(algorithms))))
+            shown_header = header
+        footer = (instrument, footer_contents())
+        if footer != shown_footer:
+            bottom = max(view.rect.bottom for view in views)
+            dirty.append(draw_region(pygame.Rect(0, bottom, width, height - bottom), draw_bottom))
+            shown_footer = footer
+
+        if full_redraw:
+            pygame.display.update()
+            full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+
+        # Charge the frame to the searches it animated
+        if animated:
+            render_ns = time.perf_counter_ns() - render_start
+            for probe in probes:
+                if probe is not None:
+                    probe.add("render", render_ns)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -300,77 +502,97 @@ def main():
 
             if event.type == pygame.VIDEORESIZE:
                 handle_resize(event.w, event.h)
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and start and end:
-                    
-                    # Convert stored coords into actual Box objects
-                    sr, sc = start
-                    er, ec = end
-
-                    bfs_start  = bfs_grid[sr][sc]
-                    bfs_end    = bfs_grid[er][ec]
-                    dij_start  = dij_grid[sr][sc]
-                    dij_end    = dij_grid[er][ec]
-                    ast_start  = astar_grid[sr][sc]
-                    ast_end    = astar_grid[er][ec]
-
-                    # Define per-panel draw functions
-                    def draw_bfs():
-                        screen.fill(WHITE)
-                        draw_labels()
-                        draw_panel(bfs_grid, 0)
-                        draw_panel(dij_grid, 1)
-                        draw_panel(astar_grid, 2)
-                        draw_stats(timers, expanded, path_lengths, path_costs)
-                        pygame.display.update()
-
-                    def draw_dij():
-                        screen.fill(WHITE)
-                        draw_labels()
-                        draw_panel(bfs_grid, 0)
-                        draw_panel(dij_grid, 1)
-                        draw_panel(astar_grid, 2)
-                        draw_stats(timers, expanded, path_lengths, path_costs)
-                        pygame.display.update()
-
-                    def draw_ast():
-                        screen.fill(WHITE)
-                        draw_labels()
-                        draw_panel(bfs_grid, 0)
-                        draw_panel(dij_grid, 1)
-                        draw_panel(astar_grid, 2)
-                        draw_stats(timers, expanded, path_lengths, path_costs)
-                        pygame.display.update()
-
-                    # Update neighbors for all grids before running algorithms
-                    for r in range(ROWS):
-                        for c in range(COLS):
-                            bfs_grid[r][c].update_neighbors(bfs_grid)
-                            dij_grid[r][c].update_neighbors(dij_grid)
-                            astar_grid[r][c].update_neighbors(astar_grid)
-
-                    # Run all three algorithms and capture stats
-                    timers[0] = BFS_algorithm(draw_bfs, bfs_grid, bfs_start, bfs_end)
-                    expanded[0], path_lengths[0], path_costs[0] = expanded_and_path(bfs_grid)
-
-                    timers[1] = dijkstra_algorithm(draw_dij, dij_grid, dij_start, dij_end)
-                    expanded[1], path_lengths[1], path_costs[1] = expanded_and_path(dij_grid)
-
-                    timers[2] = A_Star_Algorithm(draw_ast, astar_grid, ast_start, ast_end)
-                    expanded[2], path_lengths[2], path_costs[2] = expanded_and_path(astar_grid)
-
-                if event.key == pygame.K_r:
-                    # Reset grids and start/end points
-                    bfs_grid = make_grid()
-                    dij_grid = make_grid()
-                    astar_grid = make_grid()
-                    start = None
-                    end = None
-                    timers = [None, None, None]  # Reset timers
-                    expanded = [None, None, None] # Reset expanded nodes
-                    path_lengths = [None, None, None] # Reset path length
-                    path_costs = [None, None, None] # Reset path costs
+                full_redraw = True
+
+            if event.type == pygame.KEYDOWN and replays is not None:
+                # Replay mode: play, pause, seek and change speed only
+                if event.key == pygame.K_SPACE:
+                    if animation is None:
+                        animation = seek_replays([0] * len(replays))
+                        paused = False
+                    else:
+                        paused = not paused
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    step = 1 if event.key == pygame.K_RIGHT else -1
+                    animation = seek_replays([trace.position + step * len(trace) // 10
+                                              for trace in replays])
+                elif event.key == pygame.K_MINUS or event.key == pygame.K_EQUALS:
+                    speed = change_speed(speed, 1 if event.key == pygame.K_EQUALS else -1)
+                    if animation is not None:
+                        animation.speed = speed
+
+            elif event.type == pygame.KEYDOWN:
+                if (event.key == pygame.K_SPACE and start and end
+                        and animation is None and pending is None):
+                    # Record every panel's search at once in worker processes.
+                    # The shared terrain is not edited while they run; each
+                    # worker gets a copy of it.
+                    pending = [None] * PANELS
+                    searched = [] # panels whose search goes to the pool
+                    s, e = terrain.index(*start), terrain.index(*end)
+                    for i, g in enumerate(grids):
+                        clear_search(g)
+                        results[i] = None
+                        probes[i] = None
+                        if algorithms[i] == "hpa" and planners[i] is None:
+                            # Building HPA*'s cluster graph takes seconds on
+                            # large maps: build it in a worker, so the window
+                            # keeps responding; the search runs once it is done
+                            pending[i] = tracing.get_pool().submit(HPAStar, terrain)
+                            continue
+                        if algorithms[i] in KEPT:
+                            pending[i] = Future()
+                            pending[i].set_result(record_kept(i, s, e))
+                            continue
+                        # Same grid, start and end as an earlier run: replay its
+                        # trace (instrumented runs always search again)
+                        trace = None if instrument else cache.get(terrain, algorithms[i], s, e)
+                        if trace is not None:
+                            pending[i] = Future()
+                            pending[i].set_result(trace)
+                            continue
+                        searched.append(i)
+                    if searched:
+                        futures = tracing.submit([algorithms[i] for i in searched], terrain, s, e,
+                                                 instrument)
+                        for i, future in zip(searched, futures):
+                            pending[i] = future
+
+                if event.key == pygame.K_s and animation is None and pending is None:
+                    # Save the map with its start and end
+                    try:
+                        os.makedirs(os.path.dirname(map_path) or ".", exist_ok=True)
+                        save_map(map_path, terrain,
+                                 None if start is None else terrain.index(*start),
+                                 None if end is None else terrain.index(*end))
+                        print(f"Saved {map_path}")
+                    except (OSError, ValueError) as error:
+                        print(f"Could not save {map_path}: {error}")
+
+                loaded = None
+                if event.key == pygame.K_o and animation is None and pending is None:
+                    try:
+                        loaded = load_map(map_path)
+                    except (OSError, ValueError) as error:
+                        print(f"Could not open {map_path}: {error}")
+
+                if event.key == pygame.K_r or loaded is not None:
+                    # Reset grids and start/end points, or show the opened map
+                    animation = None
+                    pending = None
+                    if loaded is not None:
+                        terrain, s, e = loaded
+                        rows, cols = terrain.rows, terrain.cols
+                        grids, start, end = grids_of_map(terrain, s, e, PANELS)
+                        full_redraw = True
+                    else:
+                        terrain = Terrain(rows, cols)
+                        grids = [overlay_of(terrain) for _ in algorithms]
+                        start = None
+                        end = None
+                    results = [None] * PANELS # Reset stats
+                    probes = [None] * PANELS # Reset instrumentation
+                    planners = [None] * PANELS # Drop incremental searches
                     paint_mode = "wall" # default paint mode
 
                 if event.key == pygame.K_q:
@@ -382,21 +604,71 @@ def main():
                 if event.key == pygame.K_e:
                     paint_mode = "water"
 
-        # Mouse editing (center panel only)
+                if event.key == pygame.K_i:
+                    instrument = not instrument
+
+                if event.key == pygame.K_v and not HAVE_NUMPY:
+                    print("Wavefront BFS needs NumPy: pip install numpy")
+                elif (event.key in (pygame.K_j, pygame.K_b, pygame.K_l, pygame.K_h, pygame.K_v)
+                        and animation is None and pending is None):
+                    # J swaps A* panels between A* and Jump Point Search,
+                    # B swaps Dijkstra and A* with their bidirectional variants,
+                    # L swaps A* with incremental LPA*, H with hierarchical
+                    # HPA*, V swaps BFS with the NumPy wavefront BFS. Panels
+                    # are picked by the algorithm they started with.
+                    if event.key == pygame.K_v:
+                        swaps = {"bfs": "wavefront"}
+                    elif event.key == pygame.K_j:
+                        swaps = {"astar": "jps"}
+                    elif event.key == pygame.K_l:
+                        swaps = {"astar": "lpastar"}
+                    elif event.key == pygame.K_h:
+                        swaps = {"astar": "hpa"}
+                    else:
+                        swaps = {"dijkstra": "bidijkstra", "astar": "biastar"}
+                    for i, home in enumerate(homes):
+                        if home not in swaps:
+                            continue
+                        variant = swaps[home]
+                        algorithms[i] = home if algorithms[i] == variant else variant
+                        planners[i] = None
+                        clear_search(grids[i])
+                        results[i] = None
+                        probes[i] = None
+
+                if event.key == pygame.K_MINUS or event.key == pygame.K_EQUALS:
+                    speed = change_speed(speed, 1 if event.key == pygame.K_EQUALS else -1)
+                    if animation is not None:
+                        animation.speed = speed
+
+        # Mouse editing (any panel), not while searches are running, so the
+        # terrain stays fixed during a run
         mouse = pygame.mouse.get_pressed()
-        if mouse[0] or mouse[2]:
+        if (mouse[0] or mouse[2]) and animation is None and pending is None and replays is None:
             mx, my = pygame.mouse.get_pos()
-            pos = get_center_grid_pos(mx, my)
+            for view in views:
+                pos = view.cell_at(mx, my)
+                if pos is not None:
+                    break
             if pos is not None:
                 row, col = pos
-                start, end = apply_edit(
+                before = terrain.fingerprint
+                start, end, changed = apply_edit(
                     row, col,
                     1 if mouse[0] else 3,
                     start, end,
-                    bfs_grid, dij_grid, astar_grid,
+                    grids,
                     paint_mode
                 )
+                cells = [terrain.index(r, c) for r, c in changed]
+                cache.edited(terrain, cells, before)
+                for planner in planners:
+                    if planner is not None and cells:
+                        planner.update(cells)
+
+        clock.tick(60)
 
+    tracing.shutdown_pool()
     pygame.quit()
 
 #  Main entry point
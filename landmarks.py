@@ -0,0 +1,140 @@
+import heapq # Import heapq for priority queue implementation
+import struct # Import struct for the table file header
+from array import array # Import array for compact distance tables
+
+from search import distance_to
+
+# ALT heuristic (A*, Landmarks, Triangle inequality). A few landmark cells
+# are chosen and the exact cost from every cell to each landmark and back is
+# precomputed. For a landmark L, the triangle inequality bounds the cost of
+# any cell v to the goal t from below by
+#     d(L, t) - d(L, v)   and   d(v, L) - d(t, L)
+# Unlike Manhattan distance these bounds see walls and mud/water costs, so A*
+# expands far fewer cells on mazes and swampy maps. Costs are directed like
+# the search core (moving out of a cell costs its weight), so both tables are
+# kept. The bounds are consistent, and so is their max with Manhattan.
+#
+# Tables are int32 arrays, UNREACHED where a cell and a landmark are not
+# connected; such landmarks give no bound for that cell. The tables describe
+# one terrain: after edits, check stale and build them again.
+
+LANDMARKS = 4       # default number of landmarks
+UNREACHED = -1      # table entry of cells not connected to the landmark
+MAGIC = b"ALT1"     # table file signature
+HEADER = struct.Struct("<4sIIIQ") # magic, rows, cols, landmark count, terrain fingerprint
+
+# Exact costs from source to every cell (backward=False) or from every cell
+# to source (backward=True), as an int32 array
+def distance_table(terrain, source, backward=False):
+    weights = terrain.weights
+    dist = array("i", [UNREACHED]) * len(terrain)
+    neighbors = terrain.neighbors
+    heap = [(0, source)]
+    dist[source] = 0
+    while heap:
+        cost, current = heapq.heappop(heap)
+        if cost != dist[current]:
+            continue
+        for neighbor in neighbors(current):
+            new_cost = cost + (weights[neighbor] if backward else weights[current])
+            known = dist[neighbor]
+            if known == UNREACHED or new_cost < known:
+                dist[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost, neighbor))
+    return dist
+
+class Landmarks:
+    __slots__ = ("terrain", "cells", "forward", "backward", "fingerprint")
+
+    # Pick count landmarks and build their tables. Landmarks are picked
+    # farthest-first: the first is the open cell farthest from first (the
+    # first open cell by default), each next one the cell whose distance to
+    # the landmarks already chosen is largest.
+    def __init__(self, terrain, count=LANDMARKS, first=None):
+        self.terrain = terrain
+        self.cells = []
+        self.forward = []  # forward[i][v]: cost from landmark i to v
+        self.backward = [] # backward[i][v]: cost from v to landmark i
+        self.fingerprint = terrain.fingerprint
+        if first is None:
+            first = bytes(terrain.walls).find(0)
+            if first == -1:
+                return
+        nearest = distance_table(terrain, first) # distance to the closest chosen cell
+        for _ in range(count):
+            cell = max(range(len(nearest)), key=nearest.__getitem__)
+            if nearest[cell] <= 0:
+                break # every reachable cell is a landmark already
+            self.add(cell)
+            table = self.forward[-1]
+            for v, cost in enumerate(table):
+                if cost != UNREACHED and cost < nearest[v]:
+                    nearest[v] = cost
+
+    # Add a landmark and build its tables
+    def add(self, cell):
+        self.cells.append(cell)
+        self.forward.append(distance_table(self.terrain, cell))
+        self.backward.append(distance_table(self.terrain, cell, backward=True))
+
+    # True once the terrain has changed since the tables were built
+    @property
+    def stale(self):
+        return self.terrain.fingerprint != self.fingerprint
+
+    # Lower bound on the cost from a cell to goal, as a one-argument estimate
+    # for search.a_star(..., estimate=)
+    def estimate_to(self, goal):
+        manhattan = distance_to(goal, self.terrain.cols)
+        bounds = [(forward, forward[goal], backward, backward[goal])
+                  for forward, backward in zip(self.forward, self.backward)]
+
+        def estimate(cell):
+            best = manhattan(cell)
+            for forward, to_goal, backward, from_goal in bounds:
+                from_landmark = forward[cell]
+                if to_goal != UNREACHED and from_landmark != UNREACHED:
+                    if to_goal - from_landmark > best:
+                        best = to_goal - from_landmark
+                to_landmark = backward[cell]
+                if from_goal != UNREACHED and to_landmark != UNREACHED:
+                    if to_landmark - from_goal > best:
+                        best = to_landmark - from_goal
+            return best
+        return estimate
+
+    # Write the tables to a file: a header, the landmark cells, then the
+    # forward and backward table of each landmark
+    def save(self, path):
+        terrain = self.terrain
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, terrain.rows, terrain.cols, len(self.cells), self.fingerprint))
+            array("i", self.cells).tofile(f)
+            for forward, backward in zip(self.forward, self.backward):
+                forward.tofile(f)
+                backward.tofile(f)
+
+    # Read tables written by save() for this terrain; raises ValueError if
+    # they were built for a different map
+    @classmethod
+    def load(cls, path, terrain):
+        landmarks = cls.__new__(cls)
+        landmarks.terrain = terrain
+        with open(path, "rb") as f:
+            magic, rows, cols, count, fingerprint = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a landmark table file")
+            if (rows, cols, fingerprint) != (terrain.rows, terrain.cols, terrain.fingerprint):
+                raise ValueError(f"{path} was built for a different map")
+            cells = array("i")
+            cells.fromfile(f, count)
+            landmarks.cells = cells.tolist()
+            landmarks.forward = []
+            landmarks.backward = []
+            for _ in range(count):
+                for tables in (landmarks.forward, landmarks.backward):
+                    table = array("i")
+                    table.fromfile(f, len(terrain))
+                    tables.append(table)
+        landmarks.fingerprint = fingerprint
+        return landmarks
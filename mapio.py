@@ -0,0 +1,188 @@
+import mmap # Import mmap for memory-mapped loading
+import os # Import os for paths
+import re # Import re to validate map data at C speed
+import struct # Import struct for the binary header
+
+from grid import Terrain, find_wall, NORMAL_WEIGHT, MUD_WEIGHT, WATER_WEIGHT
+from search import dijkstra
+
+# Map files, with their start and end cells.
+#
+# Binary (.grid, any extension but .map): a 24-byte header, then the walls
+# (one 0/1 byte per cell) and the weights (one byte per cell), in the same
+# layout as grid.Terrain. Loading reads both arrays with one call each, or
+# memory-maps the file so a large map opens without reading it.
+#
+#   magic "GRID", version, reserved, rows, cols, start, end (-1 for none)
+#
+# MovingAI (.map and .scen, https://movingai.com/benchmarks/formats.html):
+# the text format of the grid benchmark sets. '.' and 'G' are open, '@', 'O'
+# and 'T' are walls; 'S' (swamp) is read as mud and 'W' as water, so they are
+# traversable at their weights. A .scen file lists queries on a map, one per
+# line; the first one gives the start and end of a map saved with both.
+
+MAGIC = b"GRID"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIii")
+
+MAP_CHARS = b".G@OTSW"
+WALL_CHARS = bytes(1 if c in b"@OT" else 0 for c in range(256))
+WEIGHT_OF_CHAR = bytes(MUD_WEIGHT if c == ord("S") else WATER_WEIGHT if c == ord("W") else NORMAL_WEIGHT
+                       for c in range(256))
+CHAR_OF_WEIGHT = bytes(ord(".") if w == NORMAL_WEIGHT else ord("S") if w == MUD_WEIGHT
+                       else ord("W") if w == WATER_WEIGHT else ord("?") for w in range(256))
+
+# Binary format
+
+def write_grid(path, terrain, start=None, end=None):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, terrain.rows, terrain.cols,
+                            -1 if start is None else start, -1 if end is None else end))
+        f.write(terrain.walls)
+        f.write(terrain.weights)
+
+# Read a binary map; returns (terrain, start, end), start and end None if
+# not saved. With mapped=True the terrain's arrays are views of a
+# copy-on-write memory map of the file: pages are read as cells are first
+# touched, and edits stay in memory.
+def read_grid(path, mapped=False):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:4] != MAGIC:
+            raise ValueError(f"{path} is not a binary map")
+        _, version, _, rows, cols, start, end = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported map version {version}")
+        size = rows * cols
+        if os.fstat(f.fileno()).st_size < HEADER.size + 2 * size:
+            raise ValueError(f"{path} is truncated")
+        if mapped and size:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            walls = view[HEADER.size:HEADER.size + size]
+            weights = view[HEADER.size + size:HEADER.size + 2 * size]
+        else:
+            walls = bytearray(size)
+            weights = bytearray(size)
+            f.readinto(walls)
+            f.readinto(weights)
+    if re.search(b"\x00", weights):
+        raise ValueError(f"{path}: weights must be at least 1")
+    for cell in (start, end):
+        if not -1 <= cell < size:
+            raise ValueError(f"{path}: start or end outside the grid")
+    return Terrain(rows, cols, walls, weights), None if start < 0 else start, None if end < 0 else end
+
+# MovingAI format
+
+def write_movingai(path, terrain):
+    chars = bytearray(bytes(terrain.weights).translate(CHAR_OF_WEIGHT))
+    if b"?" in chars:
+        raise ValueError("MovingAI maps only have normal, mud and water weights")
+    for match in find_wall(terrain.walls):
+        chars[match.start()] = ord("@")
+    cols = terrain.cols
+    with open(path, "wb") as f:
+        f.write(b"type octile\nheight %d\nwidth %d\nmap\n" % (terrain.rows, cols))
+        for first in range(0, len(chars), cols):
+            f.write(chars[first:first + cols] + b"\n")
+
+def read_movingai(path):
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    fields = {}
+    for number, line in enumerate(lines):
+        words = line.split()
+        if words == [b"map"]:
+            break
+        if len(words) == 2:
+            fields[words[0].decode()] = words[1]
+    else:
+        raise ValueError(f"{path} is not a MovingAI map")
+    try:
+        rows, cols = int(fields["height"]), int(fields["width"])
+    except (KeyError, ValueError):
+        raise ValueError(f"{path}: missing or bad height/width") from None
+    data = b"".join(line.rstrip(b"\r") for line in lines[number + 1:number + 1 + rows])
+    if len(data) != rows * cols:
+        raise ValueError(f"{path}: map rows do not match {rows}x{cols}")
+    unknown = data.translate(None, MAP_CHARS)
+    if unknown:
+        raise ValueError(f"{path}: unknown map character {unknown[:1].decode(errors='replace')!r}")
+    return Terrain(rows, cols, bytearray(data.translate(WALL_CHARS)),
+                   bytearray(data.translate(WEIGHT_OF_CHAR)))
+
+# Queries of a .scen file as (map, start, end, optimal) tuples; map is the
+# map path as written in the file and optimal the cost it records
+def read_scen(path):
+    queries = []
+    with open(path) as f:
+        lines = f.read().splitlines()
+    if not lines or not lines[0].startswith("version"):
+        raise ValueError(f"{path} is not a MovingAI scenario")
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        if len(fields) != 9:
+            raise ValueError(f"{path}: bad scenario line {line!r}")
+        _, name, width, _, start_x, start_y, end_x, end_y, optimal = fields
+        width = int(width)
+        queries.append((name, int(start_y) * width + int(start_x),
+                        int(end_y) * width + int(end_x), float(optimal)))
+    return queries
+
+# Write (start, end) queries on a map, recording each optimal cost
+def write_scen(path, map_name, terrain, pairs):
+    cols = terrain.cols
+    with open(path, "w") as f:
+        f.write("version 1\n")
+        for start, end in pairs:
+            result = dijkstra(terrain, start, end)
+            cost = result.cost if result.found else -1
+            start_y, start_x = divmod(start, cols)
+            end_y, end_x = divmod(end, cols)
+            f.write(f"{max(cost, 0) // 4}\t{map_name}\t{cols}\t{terrain.rows}\t"
+                    f"{start_x}\t{start_y}\t{end_x}\t{end_y}\t{cost:.8f}\n")
+
+# Map file of a scenario, relative to the scenario's folder (benchmark sets
+# ship their .scen files in a separate tree, so the bare name is tried next)
+def scen_map_path(scen_path, name):
+    folder = os.path.dirname(scen_path)
+    path = os.path.join(folder, name)
+    if os.path.exists(path):
+        return path
+    return os.path.join(folder, os.path.basename(name))
+
+# Terrain and (start, end) pairs of a .scen file
+def load_scen(path):
+    queries = read_scen(path)
+    if not queries:
+        raise ValueError(f"{path} has no queries")
+    terrain = read_movingai(scen_map_path(path, queries[0][0]))
+    return terrain, [(start, end) for _, start, end, _ in queries]
+
+# Either format, picked by extension
+
+# Load a map; returns (terrain, start, end). For a .map, start and end come
+# from the first query of the .scen file next to it, if there is one.
+def load_map(path, mapped=False):
+    if not path.endswith(".map"):
+        return read_grid(path, mapped)
+    terrain = read_movingai(path)
+    scen = path[:-len(".map")] + ".scen"
+    if not os.path.exists(scen):
+        return terrain, None, None
+    queries = read_scen(scen)
+    if not queries:
+        return terrain, None, None
+    _, start, end, _ = queries[0]
+    return terrain, start, end
+
+# Save a map; a .map gets a .scen next to it when start and end are given
+def save_map(path, terrain, start=None, end=None):
+    if not path.endswith(".map"):
+        write_grid(path, terrain, start, end)
+        return
+    write_movingai(path, terrain)
+    if start is not None and end is not None:
+        write_scen(path[:-len(".map")] + ".scen", os.path.basename(path), terrain, [(start, end)])
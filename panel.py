@@ -0,0 +1,133 @@
+import pygame
+
+from grid import EMPTY, PALETTE, WHITE, GREY
+
+# Drawing of one grid into a rectangular area of the window, shared by
+# joint_UI and the single-algorithm visualizers.
+#
+# Grids whose cells are at least MIN_CELL pixels are drawn cell by cell over a
+# cached grid-line layer, and only changed cells are repainted. Larger grids
+# (e.g. 2000x2000 in a 400px panel) are drawn from an 8-bit palette surface
+# that shares memory with the grid's state bytes and is scaled to fit.
+
+MIN_CELL = 4          # smallest cell size drawn with grid lines
+MAX_DIRTY_RECTS = 400 # beyond this many changed cells, update the whole panel
+
+# Palette for 8-bit surfaces over grid.states
+SURFACE_PALETTE = list(PALETTE) + [WHITE] * (256 - len(PALETTE))
+
+class PanelView:
+    __slots__ = ("rows", "cols", "cell", "left", "top", "width", "height",
+                 "layer", "shown", "pixels", "source")
+
+    def __init__(self):
+        self.layer = None
+        self.shown = None  # copy of the states currently on screen
+        self.pixels = None # palette surface over the grid's states (large grids)
+        self.source = None # states buffer the palette surface was made from
+
+    # Letterbox a rows x cols grid into area (a pygame.Rect); on start and resize
+    def layout(self, area, rows, cols):
+        cell = min(area.width // cols, area.height // rows)
+        self.rows = rows
+        self.cols = cols
+        self.shown = None
+        if cell >= MIN_CELL:
+            self.cell = cell
+            self.width = cell * cols
+            self.height = cell * rows
+            layer = pygame.Surface((self.width + 1, self.height + 1))
+            layer.fill(WHITE)
+            for i in range(rows + 1):
+                pygame.draw.line(layer, GREY, (0, i * cell), (self.width, i * cell))
+            for j in range(cols + 1):
+                pygame.draw.line(layer, GREY, (j * cell, 0), (j * cell, self.height))
+            self.layer = layer
+        else:
+            scale = min(area.width / cols, area.height / rows)
+            self.cell = 0
+            self.width = max(1, int(cols * scale))
+            self.height = max(1, int(rows * scale))
+            self.layer = None
+        self.left = area.x + (area.width - self.width) // 2
+        self.top = area.y + (area.height - self.height) // 2
+
+    @property
+    def rect(self):
+        extra = 1 if self.cell else 0
+        return pygame.Rect(self.left, self.top, self.width + extra, self.height + extra)
+
+    # (row, col) under a window position, or None outside the grid
+    def cell_at(self, x, y):
+        if not (self.left <= x < self.left + self.width and
+                self.top <= y < self.top + self.height):
+            return None
+        if self.cell:
+            row = (y - self.top) // self.cell
+            col = (x - self.left) // self.cell
+        else:
+            row = (y - self.top) * self.rows // self.height
+            col = (x - self.left) * self.cols // self.width
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    # Screen rect of a cell, inside its grid lines
+    def cell_rect(self, index):
+        row, col = divmod(index, self.cols)
+        cell = self.cell
+        return pygame.Rect(self.left + col * cell + 1, self.top + row * cell + 1,
+                           cell - 1, cell - 1)
+
+    # Draw the whole grid; returns the rect to update
+    def draw_full(self, surface, grid):
+        states = grid.states
+        if self.cell:
+            surface.blit(self.layer, (self.left, self.top))
+            cell_rect = self.cell_rect
+            for index, state in enumerate(states):
+                if state != EMPTY:
+                    surface.fill(PALETTE[state], cell_rect(index))
+        else:
+            if self.source is not states:
+                self.pixels = pygame.image.frombuffer(states, (grid.cols, grid.rows), "P")
+                self.pixels.set_palette(SURFACE_PALETTE)
+                self.source = states
+            surface.blit(pygame.transform.scale(self.pixels, (self.width, self.height)),
+                         (self.left, self.top))
+        self.shown = bytearray(states)
+        return self.rect
+
+    # Draw what changed since the last draw; returns the dirty rects
+    def draw_changes(self, surface, grid):
+        states = grid.states
+        shown = self.shown
+        if shown is None or len(shown) != len(states):
+            return [self.draw_full(surface, grid)]
+        if states == shown:
+            return []
+        if not self.cell: # scaled: redraw the whole panel
+            return [self.draw_full(surface, grid)]
+
+        # Compare row by row so unchanged rows are skipped at C speed
+        cols = self.cols
+        new_rows = memoryview(states)
+        old_rows = memoryview(shown)
+        rects = []
+        for first in range(0, len(states), cols):
+            last = first + cols
+            if new_rows[first:last] == old_rows[first:last]:
+                continue
+            for index in range(first, last):
+                state = states[index]
+                if state != shown[index]:
+                    shown[index] = state
+                    rect = self.cell_rect(index)
+                    surface.fill(PALETTE[state], rect)
+                    rects.append(rect)
+        new_rows.release()
+        old_rows.release()
+
+        if len(rects) > MAX_DIRTY_RECTS:
+            return [self.rect]
+        return rects
@@ -0,0 +1,252 @@
+import heapq # Import heapq for the fallback queue
+from collections import deque # Import deque for FIFO buckets
+
+# Priority queues for the searches, selected by name with make_queue().
+# All of them pop the smallest priority first. The heap and the bucket
+# queue break ties first-in first-out, like the searches always have; the
+# radix heap keeps ties in near-insertion order. The searches re-push cells
+# whose cost improves and skip the superseded entries; the indexed heap
+# instead updates the queued entry in place (decrease-key).
+#
+# push(priority, item), pop() -> (priority, item), peek() -> (priority, item)
+# and len() are the whole interface. The bucket queue and the radix heap need
+# non-negative integer priorities, which is what terrain weights give.
+
+# Binary heap of (priority, count, item); works for any priorities
+class HeapQueue:
+    __slots__ = ("heap", "count")
+
+    def __init__(self, span=None):
+        self.heap = []
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, priority, item):
+        self.count += 1
+        heapq.heappush(self.heap, (priority, self.count, item))
+
+    def pop(self):
+        priority, _, item = heapq.heappop(self.heap)
+        return priority, item
+
+    def peek(self):
+        priority, _, item = self.heap[0]
+        return priority, item
+
+# Indexed binary heap with decrease-key: pushing a queued item again with a
+# lower priority moves its entry up instead of adding a second one, so pops
+# are never stale. Ties are ordered by the latest push, the same order lazy
+# re-pushing into HeapQueue gives.
+class IndexedHeap:
+    __slots__ = ("keys", "items", "position", "count")
+
+    def __init__(self, span=None):
+        self.keys = []     # (priority, count) per heap slot
+        self.items = []    # item per heap slot
+        self.position = {} # item -> heap slot
+        self.count = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def push(self, priority, item):
+        self.count += 1
+        key = (priority, self.count)
+        slot = self.position.get(item)
+        if slot is None:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.items.append(item)
+        elif key < self.keys[slot]:
+            self.keys[slot] = key
+        else:
+            return # not a decrease
+        self._sift_up(slot, key, item)
+
+    def pop(self):
+        keys = self.keys
+        items = self.items
+        key = keys[0]
+        item = items[0]
+        del self.position[item]
+        last_key = keys.pop()
+        last_item = items.pop()
+        if keys:
+            self._sift_down(0, last_key, last_item)
+        return key[0], item
+
+    def peek(self):
+        return self.keys[0][0], self.items[0]
+
+    def _sift_up(self, slot, key, item):
+        keys = self.keys
+        items = self.items
+        position = self.position
+        while slot:
+            parent = (slot - 1) >> 1
+            if keys[parent] <= key:
+                break
+            keys[slot] = keys[parent]
+            items[slot] = items[parent]
+            position[items[slot]] = slot
+            slot = parent
+        keys[slot] = key
+        items[slot] = item
+        position[item] = slot
+
+    def _sift_down(self, slot, key, item):
+        keys = self.keys
+        items = self.items
+        position = self.position
+        size = len(keys)
+        while True:
+            child = 2 * slot + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if key <= keys[child]:
+                break
+            keys[slot] = keys[child]
+            items[slot] = items[child]
+            position[items[slot]] = slot
+            slot = child
+        keys[slot] = key
+        items[slot] = item
+        position[item] = slot
+
+# Dial's bucket queue: a ring of FIFO buckets, one per priority, swept by a
+# cursor. Pushes and pops are O(1) while all queued priorities fit in the
+# ring; span is the expected spread (largest step cost + 1 for A*), and the
+# ring grows if a push falls outside it.
+class BucketQueue:
+    __slots__ = ("buckets", "width", "cursor", "high", "size")
+
+    def __init__(self, span=8):
+        self.width = max(2, span + 1)
+        self.buckets = [deque() for _ in range(self.width)]
+        self.cursor = 0 # no queued priority is below this
+        self.high = 0   # no queued priority is above this
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, priority, item):
+        if not self.size:
+            self.cursor = self.high = priority
+        elif priority < self.cursor or priority > self.high:
+            low = min(self.cursor, priority)
+            high = max(self.high, priority)
+            if high - low >= self.width:
+                self._grow(high - low + 1)
+            self.cursor = low
+            self.high = high
+        self.buckets[priority % self.width].append(item)
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        width = self.width
+        cursor = self.cursor
+        while not buckets[cursor % width]:
+            cursor += 1
+        self.cursor = cursor
+        self.size -= 1
+        return cursor, buckets[cursor % width].popleft()
+
+    def peek(self):
+        buckets = self.buckets
+        width = self.width
+        cursor = self.cursor
+        while not buckets[cursor % width]:
+            cursor += 1
+        self.cursor = cursor
+        return cursor, buckets[cursor % width][0]
+
+    # Rebuild the ring with room for at least span priorities
+    def _grow(self, span):
+        old = self.buckets
+        old_width = self.width
+        width = old_width
+        while width < span:
+            width *= 2
+        buckets = [deque() for _ in range(width)]
+        for priority in range(self.cursor, self.high + 1):
+            buckets[priority % width] = old[priority % old_width]
+        self.buckets = buckets
+        self.width = width
+
+# Radix heap: bucket i holds the priorities whose highest bit differing from
+# the last popped priority is bit i - 1, so each item moves down at most once
+# per bit. Meant for monotone use (pushes never below the last pop); a lower
+# push is still handled, by rebasing every queued item.
+class RadixHeap:
+    __slots__ = ("buckets", "last", "size")
+
+    def __init__(self, span=None):
+        self.buckets = [deque()] + [[] for _ in range(32)]
+        self.last = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, priority, item):
+        if priority < self.last:
+            self._rebase(priority)
+        slot = (priority ^ self.last).bit_length()
+        buckets = self.buckets
+        while slot >= len(buckets):
+            buckets.append([])
+        buckets[slot].append((priority, item))
+        self.size += 1
+
+    def pop(self):
+        if not self.buckets[0]:
+            self._refill()
+        self.size -= 1
+        return self.buckets[0].popleft()
+
+    def peek(self):
+        if not self.buckets[0]:
+            self._refill()
+        return self.buckets[0][0]
+
+    # Move the first non-empty bucket down around its smallest priority
+    def _refill(self):
+        buckets = self.buckets
+        slot = 1
+        while not buckets[slot]:
+            slot += 1
+        entries = buckets[slot]
+        buckets[slot] = []
+        last = min(entry[0] for entry in entries)
+        self.last = last
+        for entry in entries:
+            buckets[(entry[0] ^ last).bit_length()].append(entry)
+
+    # Re-bucket everything around a new, lower last priority
+    def _rebase(self, last):
+        entries = list(self.buckets[0])
+        for bucket in self.buckets[1:]:
+            entries.extend(bucket)
+        self.buckets = [deque()] + [[] for _ in range(len(self.buckets) - 1)]
+        self.last = last
+        for entry in entries:
+            self.buckets[(entry[0] ^ last).bit_length()].append(entry)
+
+# Queues by name
+QUEUES = {
+    "heap": HeapQueue,
+    "dial": BucketQueue,
+    "radix": RadixHeap,
+    "indexed": IndexedHeap,
+}
+
+# Create a queue by name; span is the largest expected gap between the
+# smallest and largest queued priority (the bucket queue sizes its ring by it)
+def make_queue(kind="heap", span=8):
+    return QUEUES[kind](span)
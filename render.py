@@ -0,0 +1,281 @@
+import argparse # Import argparse for the command line interface
+import multiprocessing # Import multiprocessing for batch rendering
+import os # Import os for output paths
+import struct # Import struct for PNG and GIF headers
+import zlib # Import zlib for PNG compression
+
+from animation import Track
+from grid import PALETTE, GREY, grid_of, make_painter
+from search import CLOSED, PATH
+
+# Headless rendering of grids and searches to image files, with no display
+# and no pygame: frames are drawn straight from grid.states, which already
+# holds one palette index per cell, into 8-bit indexed pixels.
+#
+#   PNG  indexed color, one IDAT, written with zlib
+#   GIF  animated, LZW-compressed in Python; each frame only covers the band
+#        of rows that changed since the previous one
+#   frame sequences: numbered PNGs (frame_0000.png, ...), e.g. for
+#        ffmpeg -i frame_%04d.png run.mp4
+#
+# Cells of at least LINE_CELL pixels get grid lines like the UI panels
+# (panel.PanelView), so images match the window.
+
+CELL = 20      # default cell size in pixels
+LINE_CELL = 4  # smallest cell size drawn with grid lines
+LINE = len(PALETTE) # palette index of the grid lines
+FRAMES = 60    # default number of animation frames
+DELAY = 4      # hundredths of a second per GIF frame
+HOLD = 200     # hundredths of a second the last GIF frame is shown
+COLORS = list(PALETTE) + [GREY] + [(0, 0, 0)] * (16 - len(PALETTE) - 1) # 16-entry palette
+
+# Pixels of a grid's states: (width, height, bytearray of palette indices)
+def render_states(states, rows, cols, cell=CELL):
+    lines = cell >= LINE_CELL
+    width = cols * cell + lines
+    height = rows * cell + lines
+    pixels = bytearray(width * height)
+    line_row = bytes([LINE]) * width
+    for row in range(rows):
+        cells = states[row * cols:(row + 1) * cols]
+        scan = bytearray(width)
+        for x in range(cell):
+            scan[x:cols * cell:cell] = cells
+        if lines:
+            scan[0::cell] = bytes([LINE]) * (cols + 1)
+        top = row * cell * width
+        for y in range(cell):
+            pixels[top + y * width:top + (y + 1) * width] = scan
+        if lines:
+            pixels[top:top + width] = line_row
+    if lines:
+        pixels[(height - 1) * width:] = line_row
+    return width, height, pixels
+
+def render_grid(grid, cell=CELL):
+    return render_states(grid.states, grid.rows, grid.cols, cell)
+
+# PNG
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def write_png(path, width, height, pixels):
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0) # filter: none
+        raw += pixels[y * width:(y + 1) * width]
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+        f.write(png_chunk(b"PLTE", bytes(c for color in COLORS for c in color)))
+        f.write(png_chunk(b"IDAT", zlib.compress(bytes(raw), 6)))
+        f.write(png_chunk(b"IEND", b""))
+
+# Snapshot of a grid's current state as a PNG
+def snapshot(grid, path, cell=CELL):
+    write_png(path, *render_grid(grid, cell))
+
+# GIF
+
+# GIF-flavored LZW of a sequence of palette indices, as the image data
+# sub-blocks (min_size bits per index, codes up to 12 bits)
+def lzw_encode(indices, min_size):
+    clear = 1 << min_size
+    end = clear + 1
+    out = bytearray()
+    bits = 0   # pending output bits
+    count = 0  # number of pending bits
+    size = min_size + 1
+    table = {}
+    next_code = end + 1
+
+    def emit(code):
+        nonlocal bits, count
+        bits |= code << count
+        count += size
+        while count >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            count -= 8
+
+    emit(clear)
+    prefix = indices[0]
+    for index in indices[1:]:
+        key = prefix << 8 | index
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix)
+        if next_code == 4096: # table full: start over
+            emit(clear)
+            table = {}
+            next_code = end + 1
+            size = min_size + 1
+        else:
+            if next_code == 1 << size:
+                size += 1
+            table[key] = next_code
+            next_code += 1
+        prefix = index
+    emit(prefix)
+    # The decoder adds a table entry on reading that last code; if the table
+    # grows past the code size there, it reads the end code one bit wider
+    if next_code == 1 << size and size < 12:
+        size += 1
+    emit(end)
+    if count:
+        out.append(bits & 0xFF)
+
+    blocks = bytearray([min_size])
+    for i in range(0, len(out), 255):
+        chunk = out[i:i + 255]
+        blocks.append(len(chunk))
+        blocks += chunk
+    blocks.append(0)
+    return blocks
+
+# Animated GIF written frame by frame. A frame identical to the previous one
+# only lengthens it; otherwise just the rectangle around the changed pixels
+# is stored.
+class GifWriter:
+    __slots__ = ("file", "width", "height", "previous", "pending")
+
+    def __init__(self, path, width, height):
+        self.file = open(path, "wb")
+        self.width = width
+        self.height = height
+        self.previous = None
+        self.pending = None # (left, top, width, height, pixels, delay) of the frame not yet written
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF3, 0, 0))
+        self.file.write(bytes(c for color in COLORS for c in color))
+        self.file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00") # loop forever
+
+    def add(self, pixels, delay=DELAY):
+        width = self.width
+        previous = self.previous
+        if previous is None:
+            left, top, right, bottom = 0, 0, width, self.height
+        else:
+            # Changed rows, and in each the first and last changed byte, from
+            # the lowest and highest set bit of the XOR of the two rows
+            as_int = int.from_bytes
+            left, right = width, 0
+            rows = []
+            for y in range(self.height):
+                row = pixels[y * width:(y + 1) * width]
+                old = previous[y * width:(y + 1) * width]
+                if row == old:
+                    continue
+                rows.append(y)
+                diff = as_int(row, "little") ^ as_int(old, "little")
+                left = min(left, ((diff & -diff).bit_length() - 1) // 8)
+                right = max(right, (diff.bit_length() - 1) // 8 + 1)
+            if not rows:
+                *frame, pending_delay = self.pending
+                self.pending = (*frame, pending_delay + delay)
+                return
+            top, bottom = rows[0], rows[-1] + 1
+        self._flush()
+        data = b"".join(pixels[y * width + left:y * width + right] for y in range(top, bottom))
+        self.pending = (left, top, right - left, bottom - top, data, delay)
+        self.previous = bytes(pixels)
+
+    def _flush(self):
+        if self.pending is None:
+            return
+        left, top, width, height, data, delay = self.pending
+        # Graphic control (keep the previous frame under this one), then the image
+        self.file.write(b"\x21\xf9\x04\x04" + struct.pack("<H", delay) + b"\x00\x00")
+        self.file.write(b"\x2c" + struct.pack("<HHHHB", left, top, width, height, 0))
+        self.file.write(lzw_encode(data, 4))
+        self.pending = None
+
+    # Write the last frame, held for hold hundredths of a second, and close
+    def close(self, hold=HOLD):
+        if self.pending is not None:
+            *frame, delay = self.pending
+            self.pending = (*frame, max(delay, hold))
+        self._flush()
+        self.file.write(b"\x3b")
+        self.file.close()
+
+# Searches
+
+# Play a search onto a grid and write it out: an animated GIF if out ends in
+# .gif, otherwise numbered PNG frames in the directory out. steps is a step
+# generator (search.steps, tracing.Trace.replay, tracing.TraceFile.replay);
+# total, its number of expansions and path cells if known, spreads the
+# frames evenly. Returns the search's SearchResult.
+def render_search(grid, steps, out, total=None, frames=FRAMES, cell=CELL):
+    track = Track(steps, make_painter(grid))
+    per_frame = max(1, -(-total // frames)) if total else 1
+    gif = None
+    if out.endswith(".gif"):
+        width, height, pixels = render_grid(grid, cell)
+        gif = GifWriter(out, width, height)
+    else:
+        os.makedirs(out, exist_ok=True)
+    frame = 0
+    while True:
+        image = render_grid(grid, cell)
+        if gif is not None:
+            gif.add(image[2])
+        else:
+            write_png(os.path.join(out, f"frame_{frame:04d}.png"), *image)
+        frame += 1
+        if track.done:
+            break
+        track.advance(per_frame)
+    if gif is not None:
+        gif.close()
+    return track.result
+
+# Steps (expansions and path cells) of a recorded trace
+def trace_steps(trace):
+    return sum(1 for event, _ in trace if event == CLOSED or event == PATH)
+
+# Render one search on a map: <out>/<name>_<algorithm>.png (final state) and
+# .gif (animation). Runs in batch workers, so it takes plain arguments.
+def render_job(job):
+    import tracing
+    from mapio import load_map
+    map_path, algorithm, out, cell, frames = job
+    terrain, start, end = load_map(map_path)
+    if start is None or end is None:
+        raise ValueError(f"{map_path} has no start and end")
+    trace = tracing.record(algorithm, terrain, start, end)
+    grid = grid_of(terrain)
+    grid.box(start).set_start()
+    grid.box(end).set_end()
+    name = os.path.splitext(os.path.basename(map_path))[0]
+    base = os.path.join(out, f"{name}_{algorithm}")
+    result = render_search(grid, trace.replay(), base + ".gif", trace_steps(trace), frames, cell)
+    snapshot(grid, base + ".png", cell)
+    return base, result
+
+# Render many (map, algorithm) jobs across worker processes; yields
+# (output base path, SearchResult) as jobs finish
+def render_batch(maps, algorithms, out, cell=CELL, frames=FRAMES, workers=None):
+    os.makedirs(out, exist_ok=True)
+    jobs = [(map_path, algorithm, out, cell, frames) for map_path in maps for algorithm in algorithms]
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(render_job, jobs)
+
+#   python render.py maps/scenario1.map --algorithms bfs dijkstra astar --out report
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render searches on maps to PNG and GIF.")
+    parser.add_argument("maps", nargs="+", help="map files with a start and end (see mapio.py)")
+    parser.add_argument("--algorithms", nargs="+", default=["bfs", "dijkstra", "astar"])
+    parser.add_argument("--out", default="render", help="output directory (default: %(default)s)")
+    parser.add_argument("--cell", type=int, default=CELL, help="cell size in pixels (default: %(default)s)")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="GIF frames (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+    for base, result in render_batch(args.maps, args.algorithms, args.out, args.cell,
+                                     args.frames, args.workers):
+        print(f"{base}.png/.gif: {result}")
+
+if __name__ == "__main__":
+    main()
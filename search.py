@@ -0,0 +1,908 @@
+import time # Import time for time-related functions
+import heapq # Import heapq for priority queue implementation
+import re # Import re to scan rows of jump point marks at C speed
+from array import array # Import array for the reusable search state
+from collections import deque # Import deque for BFS queue
+from grid import WATER_WEIGHT
+from pqueue import make_queue
+
+# Headless search core: no pygame, no colors. Searches run on a grid.Terrain
+# and cells are integer indices (row * cols + col).
+
+# Every algorithm is written once as a step generator. With events=True it
+# yields (event, cell) tuples as it goes and returns its SearchResult; with
+# events=False it never yields, so headless runs pay nothing for stepping.
+
+# Search events
+OPEN = "open"       # cell pushed onto the frontier
+CLOSED = "closed"   # cell expanded
+PATH = "path"       # cell on the final path, reported from the end backwards
+
+# Result of a single search. Every field is counted by the search loop as
+# it runs, so results are the same with or without a display.
+class SearchResult:
+    __slots__ = ("algorithm", "found", "path", "cost", "expansions", "elapsed", "pushes", "max_open")
+
+    def __init__(self, algorithm, found, path, cost, expansions, elapsed, pushes=0, max_open=0):
+        self.algorithm = algorithm
+        self.found = found          # True if the end was reached
+        self.path = path            # list of cell indices from start to end
+        self.cost = cost            # sum of weights of the cells moved out of
+        self.expansions = expansions # number of cells expanded
+        self.elapsed = elapsed      # search time in seconds
+        self.pushes = pushes        # entries added to the open set, the start included
+        self.max_open = max_open    # largest size of the open set
+
+    @property
+    def path_length(self): # Number of steps in the path
+        return max(len(self.path) - 1, 0)
+
+    @property
+    def path_cost(self): # Cost of the path, 0 if none was found
+        return self.cost
+
+    def __repr__(self):
+        return (f"SearchResult({self.algorithm}, found={self.found}, "
+                f"cost={self.cost}, length={self.path_length}, "
+                f"expansions={self.expansions}, pushes={self.pushes}, "
+                f"max_open={self.max_open}, elapsed={self.elapsed:.6f})")
+
+# Byte translation of walls to open cells: 0 -> 1, anything else -> 0
+OPEN_TABLE = bytes([1]) + bytes(255)
+
+# Neighbors are generated on demand while a cell is expanded, so a search
+# only pays for the cells it expands, not for the size of the map. The
+# in-grid directions of a cell form a 4-bit mask (bit 0..3: Down, Up, Right,
+# Left)
+#     sides[cell % cols] | (cell < below) | (cell >= cols) << 1
+# and its neighbors are the steps of that mask that do not land on a wall.
+
+# Index offsets of the neighbors in each of the 16 masks, in Down, Up, Right, Left order
+def neighbor_steps(cols):
+    directions = (cols, -cols, 1, -1)
+    return tuple(tuple(step for bit, step in enumerate(directions) if mask >> bit & 1)
+                 for mask in range(16))
+
+# Manhattan distance between two cell indices
+def heuristic(a, b, cols):
+    ar, ac = divmod(a, cols)
+    br, bc = divmod(b, cols)
+    return abs(ar - br) + abs(ac - bc)
+
+# Manhattan distance to a fixed goal, as a one-argument estimate for A*
+def distance_to(goal, cols):
+    goal_row, goal_col = divmod(goal, cols)
+
+    def estimate(cell):
+        row, col = divmod(cell, cols)
+        return abs(row - goal_row) + abs(col - goal_col)
+    return estimate
+
+# Walk came_from back from the end, yielding PATH events, and price the path
+def reconstruct_path(terrain, came_from, start, end, events=False):
+    weights = terrain.weights
+    path = [end]
+    cost = 0
+    current = end
+    while current in came_from:
+        current = came_from[current]
+        if events:
+            yield PATH, current
+        path.append(current)
+        cost += weights[current]
+    path.reverse()
+    return path, cost
+
+# Common end of every search: rebuild the path and publish probe counters
+def finish(algorithm, terrain, came_from, start, end, found, expansions, start_time,
+           events=False, probe=None, pushes=0, stale_pops=0, relaxations=0, max_open=0):
+    if not found:
+        path, cost = [], 0
+    elif probe is None:
+        path, cost = yield from reconstruct_path(terrain, came_from, start, end, events)
+    else:
+        mark = probe.begin()
+        path, cost = yield from reconstruct_path(terrain, came_from, start, end, events)
+        probe.end("path", mark)
+    if probe is not None:
+        probe.count("pushes", pushes)
+        probe.count("stale_pops", stale_pops)
+        probe.count("relaxations", relaxations)
+    return SearchResult(algorithm, found, path, cost, expansions,
+                        time.perf_counter() - start_time, pushes, max_open)
+
+# Tables for generating neighbors: the step table, the Right/Left bits of
+# each column and the first cell of the last row
+def neighbor_tables(terrain):
+    cols = terrain.cols
+    sides = (4,) + (12,) * (cols - 2) + (8,) if cols > 1 else (0,)
+    return neighbor_steps(cols), sides, len(terrain) - cols
+
+# Per-search state in typed arrays with one slot per cell, reused across
+# queries instead of building lists over the whole grid for each one. An
+# entry is only valid while its stamp equals the state's generation; begin()
+# bumps the generation, so every entry of the previous search goes stale at
+# once and a query's setup is proportional to the cells it touches.
+#   stamp  - generation of the search that last reached the cell
+#   parent - previous cell on the best known path
+# and, allocated for the searches that read them (see STATE_ARRAYS):
+#   g      - cost from the source
+#   f      - queued priority (A*)
+#   closed - equals the generation once the cell is expanded
+STATE_ARRAYS = {"g": "q", "f": "q", "closed": "I"} # optional array -> typecode
+
+class SearchState:
+    __slots__ = ("size", "generation", "stamp", "parent", "g", "f", "closed")
+
+    def __init__(self, size):
+        self.size = size
+        self.generation = 0
+        self.stamp = array("I", bytes(4 * size))
+        self.parent = array("i", bytes(4 * size))
+        self.g = self.f = self.closed = None
+
+    # Allocate the optional arrays among names that are still missing. A
+    # new array is zeroed, and no generation is 0, so it holds no valid entry.
+    def provide(self, names):
+        for name in names:
+            if getattr(self, name) is None:
+                code = STATE_ARRAYS[name]
+                setattr(self, name, array(code, bytes(array(code).itemsize * self.size)))
+
+    # Bytes held by the arrays
+    @property
+    def nbytes(self):
+        return sum(len(table) * table.itemsize for table in
+                   (self.stamp, self.parent, self.g, self.f, self.closed) if table is not None)
+
+    # Start a search: a new generation, with source as its only valid entry
+    def begin(self, source):
+        self.generation += 1
+        if self.generation == 1 << 32: # stamps would repeat: clear them
+            self.stamp = array("I", bytes(4 * self.size))
+            if self.closed is not None:
+                self.closed = array("I", bytes(4 * self.size))
+            self.generation = 1
+        generation = self.generation
+        self.stamp[source] = generation
+        self.parent[source] = source
+        if self.g is not None:
+            self.g[source] = 0
+        return generation
+
+    # came_from dict of the path from source to cell, for finish()
+    def path_to(self, cell):
+        parent = self.parent
+        came_from = {}
+        while parent[cell] != cell:
+            previous = parent[cell]
+            came_from[cell] = previous
+            cell = previous
+        return came_from
+
+# Idle states kept for reuse, most recently released last, up to
+# FREE_STATE_BYTES in all: enough for the two states of a bidirectional
+# search on a 2000x2000 map (the largest the UI is tested with), while the
+# states of larger maps are dropped once their search is done
+FREE_STATE_BYTES = 192 << 20
+_free_states = []
+
+# A state for a grid of size cells with the optional arrays in names,
+# reused if one of that size is free
+def acquire_state(size, names=()):
+    for state in reversed(_free_states):
+        if state.size == size:
+            _free_states.remove(state)
+            break
+    else:
+        state = SearchState(size)
+    state.provide(names)
+    return state
+
+# Hand a state back once its search is done with it; the oldest free states
+# are dropped to stay within FREE_STATE_BYTES
+def release_state(state):
+    _free_states.append(state)
+    total = sum(free.nbytes for free in _free_states)
+    while total > FREE_STATE_BYTES:
+        total -= _free_states.pop(0).nbytes
+
+# Drop every free state, e.g. after queries on a large map
+def release_states():
+    _free_states.clear()
+
+# Spread hint for pqueue.make_queue: the largest step cost of the UI's
+# terrains, plus extra for a heuristic. Only Dial's bucket queue uses it,
+# and it grows its ring if a map has heavier cells, so no query scans the
+# weights of the whole map.
+QUEUE_SPAN = WATER_WEIGHT
+
+# BFS: explores level by level and ignores weights
+def bfs_steps(terrain, start, end, probe=None, events=True):
+    start_time = time.perf_counter()
+    cols = terrain.cols
+    walls = terrain.walls
+    offsets, sides, below = neighbor_tables(terrain)
+    if probe is not None:
+        mark = probe.begin()
+    state = acquire_state(len(terrain))
+    try:
+        generation = state.begin(start)
+        stamp = state.stamp # visited once stamped
+        parent = state.parent
+        queue = deque()
+        queue.append(start)
+        expansions = 0
+        max_open = 1
+        visits = 0
+        found = False
+
+        while queue:
+            current = queue.popleft()
+
+            if current == end:
+                found = True
+                break
+
+            for step in offsets[sides[current % cols] | (current < below) | (current >= cols) << 1]:
+                neighbor = current + step
+                if walls[neighbor]:
+                    continue
+                if stamp[neighbor] != generation:
+                    stamp[neighbor] = generation
+                    parent[neighbor] = current
+                    visits += 1
+                    queue.append(neighbor)
+                    if events:
+                        yield OPEN, neighbor
+
+            expansions += 1
+            if len(queue) > max_open:
+                max_open = len(queue)
+            if events:
+                yield CLOSED, current
+
+        came_from = state.path_to(end) if found else {}
+    finally:
+        release_state(state)
+
+    if probe is not None:
+        probe.end("expansion", mark)
+    return (yield from finish("BFS", terrain, came_from, start, end, found, expansions, start_time,
+                  events, probe, pushes=visits + 1, relaxations=visits, max_open=max_open))
+
+# Dijkstra: expands cells in order of cumulative cost. A cell whose cost
+# improves while queued is pushed again; the superseded entry is skipped
+# (and counted) when it comes out of the queue.
+def dijkstra_steps(terrain, start, end, probe=None, events=True, queue="heap"):
+    start_time = time.perf_counter()
+    cols = terrain.cols
+    walls = terrain.walls
+    offsets, sides, below = neighbor_tables(terrain)
+    weights = terrain.weights
+    open_set = make_queue(queue, QUEUE_SPAN)
+    push = open_set.push
+    pop = open_set.pop
+    if probe is not None:
+        push = probe.timed("heap", push)
+        pop = probe.timed("heap", pop)
+        mark = probe.begin()
+    state = acquire_state(len(terrain), ("g",))
+    try:
+        generation = state.begin(start)
+        stamp = state.stamp
+        g_score = state.g
+        parent = state.parent
+        push(0, start)
+
+        expansions = 0
+        stale_pops = 0
+        relaxations = 0
+        max_open = 1
+        found = False
+
+        while open_set:
+            current_cost, current = pop()
+            if current_cost != g_score[current]:
+                stale_pops += 1 # superseded by a cheaper push
+                continue
+
+            # reached goal
+            if current == end:
+                found = True
+                break
+
+            # explore neighbors
+            new_cost = current_cost + weights[current]
+            for step in offsets[sides[current % cols] | (current < below) | (current >= cols) << 1]:
+                neighbor = current + step
+                if walls[neighbor]:
+                    continue
+
+                if stamp[neighbor] != generation or new_cost < g_score[neighbor]:
+                    stamp[neighbor] = generation
+                    parent[neighbor] = current
+                    g_score[neighbor] = new_cost
+                    relaxations += 1
+
+                    push(new_cost, neighbor)
+                    if events:
+                        yield OPEN, neighbor
+
+            expansions += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
+            if events:
+                yield CLOSED, current
+
+        came_from = state.path_to(end) if found else {}
+    finally:
+        release_state(state)
+
+    # Every entry added was popped (expanded, stale, or the end) or is still queued;
+    # the indexed heap's decrease-keys add none
+    pushes = expansions + stale_pops + found + len(open_set)
+    if probe is not None:
+        probe.end("expansion", mark)
+    return (yield from finish("Dijkstra", terrain, came_from, start, end, found, expansions, start_time,
+                  events, probe, pushes, stale_pops, relaxations, max_open))
+
+# A*: Dijkstra guided by the Manhattan heuristic, with the same stale-entry
+# handling. estimate(cell) replaces the heuristic, e.g. with the landmark
+# bounds of landmarks.Landmarks.estimate_to(end); it must be consistent.
+def a_star_steps(terrain, start, end, probe=None, events=True, queue="heap", estimate=None):
+    start_time = time.perf_counter()
+    cols = terrain.cols
+    walls = terrain.walls
+    offsets, sides, below = neighbor_tables(terrain)
+    weights = terrain.weights
+    open_set = make_queue(queue, QUEUE_SPAN + 1)
+    push = open_set.push
+    pop = open_set.pop
+    if probe is not None:
+        push = probe.timed("heap", push)
+        pop = probe.timed("heap", pop)
+        mark = probe.begin()
+    if estimate is None:
+        estimate = distance_to(end, cols)
+    state = acquire_state(len(terrain), ("g", "f"))
+    try:
+        generation = state.begin(start)
+        stamp = state.stamp
+        g_score = state.g
+        f_score = state.f
+        parent = state.parent
+        f_score[start] = estimate(start)
+        push(f_score[start], start)
+
+        expansions = 0
+        stale_pops = 0
+        relaxations = 0
+        max_open = 1
+        found = False
+
+        while open_set:
+            current_f, current = pop()
+            if current_f != f_score[current]:
+                stale_pops += 1 # superseded by a cheaper push
+                continue
+
+            if current == end:
+                found = True
+                break
+
+            temp_g_score = g_score[current] + weights[current]
+            for step in offsets[sides[current % cols] | (current < below) | (current >= cols) << 1]:
+                neighbor = current + step
+                if walls[neighbor]:
+                    continue
+
+                if stamp[neighbor] != generation or temp_g_score < g_score[neighbor]:
+                    stamp[neighbor] = generation
+                    parent[neighbor] = current
+                    g_score[neighbor] = temp_g_score
+                    relaxations += 1
+
+                    new_f = temp_g_score + estimate(neighbor)
+                    f_score[neighbor] = new_f
+
+                    push(new_f, neighbor)
+                    if events:
+                        yield OPEN, neighbor
+
+            expansions += 1
+            if len(open_set) > max_open:
+                max_open = len(open_set)
+            if events:
+                yield CLOSED, current
+
+        came_from = state.path_to(end) if found else {}
+    finally:
+        release_state(state)
+
+    pushes = expansions + stale_pops + found + len(open_set) # popped or still queued
+    if probe is not None:
+        probe.end("expansion", mark)
+    return (yield from finish("A*", terrain, came_from, start, end, found, expansions, start_time,
+                  events, probe, pushes, stale_pops, relaxations, max_open))
+
+# Byte translations: weights to weighted cells (1 -> 0, anything else -> 1)
+# and walls to 0/1
+HEAVY_TABLE = bytes([1, 0]) + bytes([1]) * 254
+WALL_TABLE = bytes([0]) + bytes([1]) * 255
+
+# Row scan marks: a plain cell, a jump point, a wall
+PLAIN, JUMP, BLOCKED = 0, 1, 2
+find_mark = re.compile(b"[^\x00]").search # first non-plain cell of a row
+
+# Tables for Jump Point Search on weighted terrain, built with bytes
+# translation and big-int ops at C speed:
+#   stops - open cells that are weighted or next to a weighted cell; they are
+#           expanded in all directions like plain A*
+#   clear - open cells of weight 1, the only cells that count as passable for
+#           the pruning rules, so weighted cells act like walls there
+#   right, left - marks (PLAIN, JUMP, BLOCKED) for scanning a row rightwards
+#           and leftwards; left is stored reversed so both scans search forwards
+def build_jump_tables(terrain):
+    rows, cols = terrain.rows, terrain.cols
+    size = rows * cols
+    as_int = int.from_bytes
+    not_first = as_int((b"\0" + b"\1" * (cols - 1)) * rows, "little")
+    not_last = as_int((b"\1" * (cols - 1) + b"\0") * rows, "little")
+    wall_cells = as_int(bytes(terrain.walls).translate(WALL_TABLE), "little")
+    open_cells = as_int(bytes(terrain.walls).translate(OPEN_TABLE), "little")
+    heavy = as_int(bytes(terrain.weights).translate(HEAVY_TABLE), "little") & open_cells
+    near = (heavy | heavy >> 8 * cols | heavy << 8 * cols
+            | (heavy >> 8) & not_last | (heavy << 8) & not_first)
+    stops = near & open_cells
+    clear = open_cells & ~heavy
+
+    # Forced neighbors: a clear cell above or below whose cell behind is not clear
+    up = clear << 8 * cols
+    down = clear >> 8 * cols
+    forced_right = (up & ~((up << 8) & not_first)) | (down & ~((down << 8) & not_first))
+    forced_left = (up & ~((up >> 8) & not_last)) | (down & ~((down >> 8) & not_last))
+    right = ((forced_right | stops) & open_cells) | wall_cells << 1
+    left = ((forced_left | stops) & open_cells) | wall_cells << 1
+    return (stops.to_bytes(size, "little"), clear.to_bytes(size, "little"),
+            right.to_bytes(size, "little"), left.to_bytes(size, "little")[::-1])
+
+# Jump tables of the last terrain JPS ran on, reused while its fingerprint is
+# unchanged (the staleness check of landmarks.Landmarks), so a query does not
+# pay for a pass over the whole map
+_jump_tables = {}
+
+def jump_tables(terrain):
+    key = (terrain.rows, terrain.cols, terrain.fingerprint)
+    tables = _jump_tables.get(key)
+    if tables is None:
+        _jump_tables.clear()
+        tables = _jump_tables[key] = build_jump_tables(terrain)
+    return tables
+
+# Jump Point Search: A* over jump points, 4-connected (the never-diagonal
+# rules of PathFinding.js). Stop points are expanded in all directions like
+# plain A* and weighted cells block pruning, so paths stay cost-optimal on
+# weighted terrain.
+# Events report jump points only; the path is filled in cell by cell.
+def jps_steps(terrain, start, end, probe=None, events=True):
+    start_time = time.perf_counter()
+    rows, cols = terrain.rows, terrain.cols
+    size = rows * cols
+    walls = terrain.walls
+    weights = terrain.weights
+    if probe is None:
+        stops, clear, right, left = jump_tables(terrain)
+    else:
+        mark = probe.begin()
+        stops, clear, right, left = jump_tables(terrain)
+        probe.end("neighbors", mark)
+    end_row = end // cols
+    push = heapq.heappush
+    pop = heapq.heappop
+    if probe is not None:
+        push = probe.timed("heap", push)
+        pop = probe.timed("heap", pop)
+        mark = probe.begin()
+
+    def is_open(row, col):
+        return 0 <= row < rows and 0 <= col < cols and not walls[row * cols + col]
+
+    def is_clear(row, col):
+        return 0 <= row < rows and 0 <= col < cols and clear[row * cols + col]
+
+    # Scan a row from (row, col) in direction dc; first jump point or -1
+    def scan_row(row, col, dc):
+        if not 0 <= col < cols:
+            return -1
+        index = row * cols + col
+        first = row * cols
+        if dc > 0:
+            hit = find_mark(right, index, first + cols)
+            limit = first + cols if hit is None else hit.start()
+            marks = right
+        else:
+            hit = find_mark(left, size - 1 - index, size - first)
+            limit = first - 1 if hit is None else size - 1 - hit.start()
+            marks = left
+        # The end is a jump point too, if the scan gets that far
+        if row == end_row and (index <= end < limit or limit < end <= index):
+            return end
+        if hit is None or marks[hit.start()] == BLOCKED:
+            return -1
+        return limit
+
+    # Walk a column in direction dr; a cell is also a jump point when a
+    # horizontal scan from it finds one
+    def scan_col(row, col, dr):
+        while is_open(row, col):
+            index = row * cols + col
+            if index == end or stops[index]:
+                return index
+            if ((is_clear(row, col - 1) and not is_clear(row - dr, col - 1)) or
+                    (is_clear(row, col + 1) and not is_clear(row - dr, col + 1))):
+                return index # forced neighbor
+            if scan_row(row, col + 1, 1) != -1 or scan_row(row, col - 1, -1) != -1:
+                return index
+            row += dr
+        return -1
+
+    count = 0
+    open_set = []
+    push(open_set, (heuristic(start, end, cols), 0, count, start))
+
+    came_from = {}  # jump point -> previous jump point
+    g_score = {start: 0}
+    closed = set()
+    expansions = 0
+    stale_pops = 0
+    relaxations = 0
+    max_open = 1
+    found = False
+
+    while open_set:
+        _, _, _, current = pop(open_set)
+        if current in closed:
+            stale_pops += 1
+            continue
+
+        if current == end:
+            found = True
+            break
+        closed.add(current)
+
+        # Directions to jump in: all four from the start and at stop points,
+        # otherwise straight on plus both sides
+        row, col = divmod(current, cols)
+        parent = came_from.get(current)
+        if parent is None or stops[current]:
+            directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        elif parent // cols == row:
+            dc = 1 if current > parent else -1
+            directions = ((0, dc), (1, 0), (-1, 0))
+        else:
+            dr = 1 if current > parent else -1
+            directions = ((dr, 0), (0, 1), (0, -1))
+
+        g_current = g_score[current]
+        weight = weights[current]
+        for dr, dc in directions:
+            if dc:
+                jump_point = scan_row(row, col + dc, dc)
+            else:
+                jump_point = scan_col(row + dr, col, dr)
+            if jump_point == -1 or jump_point in closed:
+                continue
+
+            # Leaving current costs its weight, every cell jumped over costs 1
+            distance = abs(jump_point - current) // (cols if dr else 1)
+            new_g = g_current + weight + distance - 1
+            if new_g < g_score.get(jump_point, float("inf")):
+                came_from[jump_point] = current
+                g_score[jump_point] = new_g
+                relaxations += 1
+                count += 1
+                h = heuristic(jump_point, end, cols)
+                push(open_set, (new_g + h, h, count, jump_point))
+                if events:
+                    yield OPEN, jump_point
+
+        expansions += 1
+        if len(open_set) > max_open:
+            max_open = len(open_set)
+        if events:
+            yield CLOSED, current
+
+    if probe is not None:
+        probe.end("expansion", mark)
+    if found:
+        came_from = fill_jumps(came_from, end, cols)
+    return (yield from finish("JPS", terrain, came_from, start, end, found, expansions, start_time,
+                  events, probe, count + 1, stale_pops, relaxations, max_open))
+
+# Expand jump point links into one came_from entry per cell of the path
+def fill_jumps(jumps, end, cols):
+    came_from = {}
+    current = end
+    while current in jumps:
+        previous = jumps[current]
+        if previous // cols == current // cols:
+            step = 1 if current > previous else -1
+        else:
+            step = cols if current > previous else -cols
+        while current != previous:
+            came_from[current] = current - step
+            current -= step
+    return came_from
+
+# Bidirectional search: a forward search from start and a backward search
+# from end, expanding whichever side has the smaller frontier. Moving out of
+# a cell costs its weight, so the backward search pays the weight of the cell
+# it steps back into. mu is the best start-end cost seen where the two
+# searches touch. Dijkstra stops once top(forward) + top(backward) >= mu;
+# A* (guided=True, symmetric heuristics towards the other end) stops once
+# max(top(forward), top(backward)) >= mu. Entries are deleted lazily.
+def bidirectional_steps(algorithm, terrain, start, end, probe=None, events=True, guided=False,
+                        queue="heap"):
+    start_time = time.perf_counter()
+    cols = terrain.cols
+    walls = terrain.walls
+    offsets, sides, below = neighbor_tables(terrain)
+    weights = terrain.weights
+    span = QUEUE_SPAN + 1
+    forward = make_queue(queue, span)
+    backward = make_queue(queue, span)
+    push_forward, pop_forward = forward.push, forward.pop
+    push_backward, pop_backward = backward.push, backward.pop
+    peek_forward, peek_backward = forward.peek, backward.peek
+    if probe is not None:
+        push_forward = probe.timed("heap", push_forward)
+        pop_forward = probe.timed("heap", pop_forward)
+        push_backward = probe.timed("heap", push_backward)
+        pop_backward = probe.timed("heap", pop_backward)
+        peek_forward = probe.timed("heap", peek_forward)
+        peek_backward = probe.timed("heap", peek_backward)
+        mark = probe.begin()
+
+    def to_end(cell):
+        return heuristic(cell, end, cols) if guided else 0
+
+    def to_start(cell):
+        return heuristic(cell, start, cols) if guided else 0
+
+    # One state per direction: forward parents point back towards start,
+    # backward parents on towards end
+    ahead = acquire_state(len(terrain), ("g", "closed"))
+    behind = acquire_state(len(terrain), ("g", "closed"))
+    try:
+        generation_forward = ahead.begin(start)
+        generation_backward = behind.begin(end)
+        stamp_forward, stamp_backward = ahead.stamp, behind.stamp
+        g_forward, g_backward = ahead.g, behind.g
+        came_from, goes_to = ahead.parent, behind.parent
+        closed_forward, closed_backward = ahead.closed, behind.closed
+        push_forward(to_end(start), start)
+        push_backward(to_start(end), end)
+
+        best = 0 if start == end else float("inf") # mu
+        meet = start if start == end else None
+        expansions = 0
+        stale_pops = 0
+        relaxations = 0
+        max_open = 2
+
+        while forward and backward:
+            # Drop entries of cells already expanded so the tops are real bounds
+            while forward and closed_forward[peek_forward()[1]] == generation_forward:
+                pop_forward()
+                stale_pops += 1
+            while backward and closed_backward[peek_backward()[1]] == generation_backward:
+                pop_backward()
+                stale_pops += 1
+            if not forward or not backward:
+                break
+
+            top_forward = peek_forward()[0]
+            top_backward = peek_backward()[0]
+            if guided:
+                if max(top_forward, top_backward) >= best:
+                    break
+            elif top_forward + top_backward >= best:
+                break
+
+            if len(forward) <= len(backward):
+                _, current = pop_forward()
+                closed_forward[current] = generation_forward
+                new_g = g_forward[current] + weights[current]
+                for step in offsets[sides[current % cols] | (current < below) | (current >= cols) << 1]:
+                    neighbor = current + step
+                    if walls[neighbor] or closed_forward[neighbor] == generation_forward:
+                        continue
+                    if stamp_forward[neighbor] != generation_forward or new_g < g_forward[neighbor]:
+                        stamp_forward[neighbor] = generation_forward
+                        came_from[neighbor] = current
+                        g_forward[neighbor] = new_g
+                        relaxations += 1
+                        push_forward(new_g + to_end(neighbor), neighbor)
+                        if events:
+                            yield OPEN, neighbor
+                        if (stamp_backward[neighbor] == generation_backward
+                                and new_g + g_backward[neighbor] < best):
+                            best = new_g + g_backward[neighbor]
+                            meet = neighbor
+            else:
+                _, current = pop_backward()
+                closed_backward[current] = generation_backward
+                g_current = g_backward[current]
+                for step in offsets[sides[current % cols] | (current < below) | (current >= cols) << 1]:
+                    neighbor = current + step
+                    if walls[neighbor] or closed_backward[neighbor] == generation_backward:
+                        continue
+                    new_g = g_current + weights[neighbor] # the move neighbor -> current
+                    if stamp_backward[neighbor] != generation_backward or new_g < g_backward[neighbor]:
+                        stamp_backward[neighbor] = generation_backward
+                        goes_to[neighbor] = current
+                        g_backward[neighbor] = new_g
+                        relaxations += 1
+                        push_backward(new_g + to_start(neighbor), neighbor)
+                        if events:
+                            yield OPEN, neighbor
+                        if (stamp_forward[neighbor] == generation_forward
+                                and g_forward[neighbor] + new_g < best):
+                            best = g_forward[neighbor] + new_g
+                            meet = neighbor
+
+            expansions += 1
+            if len(forward) + len(backward) > max_open:
+                max_open = len(forward) + len(backward)
+            if events:
+                yield CLOSED, current
+
+        found = meet is not None
+        came_from = join_halves(ahead, behind, meet) if found else {}
+    finally:
+        release_state(ahead)
+        release_state(behind)
+
+    # Entries added: the ones popped (expanded or stale) and the ones still queued
+    pushes = expansions + stale_pops + len(forward) + len(backward)
+    if probe is not None:
+        probe.end("expansion", mark)
+    return (yield from finish(algorithm, terrain, came_from, start, end, found, expansions, start_time,
+                  events, probe, pushes, stale_pops, relaxations, max_open))
+
+# One came_from chain from start through meet to end, from the parents of
+# the forward and backward states
+def join_halves(ahead, behind, meet):
+    path = ahead.path_to(meet)
+    goes_to = behind.parent
+    current = meet
+    while goes_to[current] != current:
+        path[goes_to[current]] = current
+        current = goes_to[current]
+    return path
+
+def bidijkstra_steps(terrain, start, end, probe=None, events=True, queue="heap"):
+    return bidirectional_steps("Bi-Dijkstra", terrain, start, end, probe, events, False, queue)
+
+def biastar_steps(terrain, start, end, probe=None, events=True, queue="heap"):
+    return bidirectional_steps("Bi-A*", terrain, start, end, probe, events, True, queue)
+
+# Wavefront BFS over NumPy arrays (wavefront.py), imported when it first runs
+# so that NumPy stays optional
+def wavefront_steps(terrain, start, end, probe=None, events=True):
+    import wavefront
+    return (yield from wavefront.wavefront_steps(terrain, start, end, probe, events))
+
+# Step through a search generator. The time the consumer holds control
+# between events is left out of the result's elapsed time and the probe.
+def stepwise(steps, probe=None):
+    suspended = 0.0
+    while True:
+        try:
+            event = next(steps)
+        except StopIteration as stop:
+            result = stop.value
+            result.elapsed -= suspended
+            return result
+        if probe is not None:
+            probe.suspend()
+        paused = time.perf_counter()
+        yield event
+        suspended += time.perf_counter() - paused
+        if probe is not None:
+            probe.resume()
+
+# Run a search generator to the end, passing its events to observer(event, cell)
+def drive(steps, observer=None, probe=None):
+    if observer is not None:
+        if probe is not None:
+            observer = probe.timed("render", observer)
+        steps = stepwise(steps, probe)
+    while True:
+        try:
+            event, cell = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        observer(event, cell)
+
+# Searches run to completion; observer(event, cell) sees every event. The
+# priority-queue searches take queue= to pick a pqueue kind ("heap", "dial",
+# "radix", "indexed").
+def bfs(terrain, start, end, observer=None, probe=None):
+    return drive(bfs_steps(terrain, start, end, probe, observer is not None), observer, probe)
+
+def wavefront(terrain, start, end, observer=None, probe=None):
+    return drive(wavefront_steps(terrain, start, end, probe, observer is not None), observer, probe)
+
+def dijkstra(terrain, start, end, observer=None, probe=None, queue="heap"):
+    return drive(dijkstra_steps(terrain, start, end, probe, observer is not None, queue), observer, probe)
+
+def a_star(terrain, start, end, observer=None, probe=None, queue="heap", estimate=None):
+    return drive(a_star_steps(terrain, start, end, probe, observer is not None, queue, estimate),
+                 observer, probe)
+
+def jps(terrain, start, end, observer=None, probe=None):
+    return drive(jps_steps(terrain, start, end, probe, observer is not None), observer, probe)
+
+def bidijkstra(terrain, start, end, observer=None, probe=None, queue="heap"):
+    return drive(bidijkstra_steps(terrain, start, end, probe, observer is not None, queue), observer, probe)
+
+def biastar(terrain, start, end, observer=None, probe=None, queue="heap"):
+    return drive(biastar_steps(terrain, start, end, probe, observer is not None, queue), observer, probe)
+
+# Algorithms by name, for headless callers
+ALGORITHMS = {
+    "bfs": bfs,
+    "wavefront": wavefront,
+    "dijkstra": dijkstra,
+    "astar": a_star,
+    "jps": jps,
+    "bidijkstra": bidijkstra,
+    "biastar": biastar,
+}
+
+# Step generators by name
+STEPS = {
+    "bfs": bfs_steps,
+    "wavefront": wavefront_steps,
+    "dijkstra": dijkstra_steps,
+    "astar": a_star_steps,
+    "jps": jps_steps,
+    "bidijkstra": bidijkstra_steps,
+    "biastar": biastar_steps,
+}
+
+# Display names by algorithm name
+LABELS = {
+    "bfs": "BFS",
+    "wavefront": "Wavefront",
+    "dijkstra": "Dijkstra",
+    "astar": "A*",
+    "jps": "JPS",
+    "bidijkstra": "Bi-Dijkstra",
+    "biastar": "Bi-A*",
+    "lpastar": "LPA*", # incremental.LPAStar, kept between runs by the UI
+    "hpa": "HPA*",     # hpa.HPAStar, likewise
+}
+
+# Algorithms that take a queue= choice; BFS uses a FIFO and JPS its own heap
+QUEUED = ("dijkstra", "astar", "bidijkstra", "biastar")
+
+# Run an algorithm by name; pass an instrument.Probe to collect phase timings
+# and queue= to use another priority queue
+def run(name, terrain, start, end, observer=None, probe=None, queue=None):
+    if queue is None:
+        return ALGORITHMS[name](terrain, start, end, observer, probe)
+    if name not in QUEUED:
+        raise ValueError(f"{name} does not take a priority queue")
+    return ALGORITHMS[name](terrain, start, end, observer, probe, queue)
+
+# Step through an algorithm by name: yields (event, cell) and returns the
+# SearchResult, whose elapsed time excludes the time spent between steps
+def steps(name, terrain, start, end, probe=None, queue=None):
+    if queue is None:
+        return stepwise(STEPS[name](terrain, start, end, probe, True), probe)
+    if name not in QUEUED:
+        raise ValueError(f"{name} does not take a priority queue")
+    return stepwise(STEPS[name](terrain, start, end, probe, True, queue), probe)
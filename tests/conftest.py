@@ -0,0 +1,39 @@
+import os # Import os to find the repository root
+import sys # Import sys to make the top-level modules importable
+
+# The modules live at the top of the repository, next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grid import Terrain, MUD_WEIGHT, WATER_WEIGHT
+
+# Shared map factories for the tests; rng is a random.Random, so every test
+# names its own seed.
+
+# Random terrain: walls with probability walls, mud or water with probability
+# weighted; the cells in kept stay open
+def random_terrain(rng, rows, cols, walls=0.2, weighted=0.3, kept=()):
+    terrain = Terrain(rows, cols)
+    for index in range(rows * cols):
+        roll = rng.random()
+        if roll < walls:
+            terrain.walls[index] = 1
+        elif roll < walls + weighted:
+            terrain.weights[index] = rng.choice((MUD_WEIGHT, WATER_WEIGHT))
+    for cell in kept:
+        terrain.walls[cell] = 0
+    return terrain
+
+# Random terrain up to size x size with a random open start and end
+def random_case(rng, size=16):
+    rows, cols = rng.randint(1, size), rng.randint(1, size)
+    start, end = rng.randrange(rows * cols), rng.randrange(rows * cols)
+    return random_terrain(rng, rows, cols, kept=(start, end)), start, end
+
+# Random wall and weight edits through Terrain.edit, keeping the cells in
+# kept open; returns the edited cells
+def random_edits(rng, terrain, count, kept=()):
+    cells = [rng.randrange(len(terrain)) for _ in range(count)]
+    for cell in cells:
+        wall = 0 if cell in kept else int(rng.random() < 0.3)
+        terrain.edit(cell, wall=wall, weight=rng.choice((1, MUD_WEIGHT, WATER_WEIGHT)))
+    return cells
@@ -0,0 +1,42 @@
+import random # Import random for generated maps
+
+import pytest
+
+from batch import Batch, random_pairs, run_batch
+from search import run
+
+from conftest import random_terrain
+
+def fields(result):
+    return (result.algorithm, result.found, result.path, result.cost, result.expansions,
+            result.pushes, result.max_open)
+
+# Workers search a shared copy of the terrain and give what run() gives, in
+# the order of the pairs
+@pytest.mark.parametrize("name, queue", [("astar", None), ("dijkstra", "dial"), ("bfs", None),
+                                         ("jps", None), ("biastar", "radix")])
+def test_run_batch_matches_run(name, queue):
+    terrain = random_terrain(random.Random(name), 30, 40)
+    pairs = random_pairs(terrain, 150, seed=name)
+    results = run_batch(name, terrain, pairs, workers=2, queue=queue)
+    assert [fields(result) for result in results] == [
+        fields(run(name, terrain, start, end, queue=queue)) for start, end in pairs]
+
+def test_batch_sees_the_terrain_it_was_created_with():
+    terrain = random_terrain(random.Random("snapshot"), 12, 12, kept=(0, 143))
+    before = run("dijkstra", terrain, 0, 143)
+    with Batch(terrain, workers=1) as batch:
+        for cell in range(1, 143):
+            terrain.edit(cell, wall=1)
+        [(index, result)] = batch.run("dijkstra", [(0, 143)])
+    assert index == 0 and fields(result) == fields(before)
+
+def test_batch_rejects_bad_queries():
+    terrain = random_terrain(random.Random("bad"), 5, 5)
+    with Batch(terrain, workers=1) as batch:
+        with pytest.raises(ValueError, match="outside the grid"):
+            list(batch.run("astar", [(0, 25)]))
+        with pytest.raises(ValueError, match="does not take a priority queue"):
+            list(batch.run("bfs", [(0, 1)], queue="dial"))
+        with pytest.raises(ValueError, match="unknown algorithm"):
+            list(batch.run("nope", [(0, 1)]))
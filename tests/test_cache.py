@@ -0,0 +1,66 @@
+import random # Import random for generated maps and edits
+
+from cache import BOUNDED, QueryCache
+from search import run
+from tracing import record
+from wavefront import HAVE_NUMPY
+
+from conftest import random_case, random_edits
+
+# Searches to cache; the wavefront BFS needs NumPy
+NAMES = tuple(name for name in BOUNDED if HAVE_NUMPY or name != "wavefront") + ("jps",)
+
+def fields(result):
+    return (result.found, result.path, result.cost, result.expansions, result.pushes,
+            result.max_open)
+
+def test_hits_misses_and_lru_order():
+    terrain, start, end = random_case(random.Random("lru"))
+    cache = QueryCache(capacity=2)
+    cache.run("astar", terrain, start, end)
+    cache.run("astar", terrain, start, end)
+    cache.run("dijkstra", terrain, start, end)
+    cache.get(terrain, "astar", start, end) # astar becomes the most recently used
+    cache.run("bfs", terrain, start, end)   # evicts dijkstra
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.get(terrain, "dijkstra", start, end) is None
+    assert cache.get(terrain, "astar", start, end) is not None
+
+def test_byte_budget():
+    terrain, start, end = random_case(random.Random("bytes"), 30)
+    traces = {name: record(name, terrain, start, end) for name in ("bfs", "dijkstra", "astar")}
+    budget = traces["bfs"].nbytes + traces["dijkstra"].nbytes
+    cache = QueryCache(max_bytes=budget)
+    for name, trace in traces.items():
+        cache.put(terrain, name, start, end, trace, trace.result)
+        assert cache.nbytes == sum(entry[2] for entry in cache.entries.values()) <= budget
+    assert cache.get(terrain, "astar", start, end) is traces["astar"]
+    assert cache.get(terrain, "bfs", start, end) is None # least recently used
+    cache.put(terrain, "astar", start, end, traces["astar"], traces["astar"].result)
+    assert cache.nbytes == sum(entry[2] for entry in cache.entries.values())
+
+# Entries carried over an edit give what a fresh search on the edited map
+# gives, and only bounded searches that found a path are carried over
+def test_edited_keeps_only_unaffected_results():
+    rng = random.Random("edited")
+    kept = 0
+    for _ in range(150):
+        terrain, _, _ = random_case(rng, 24)
+        cache = QueryCache()
+        queries = [(name, rng.randrange(len(terrain)), rng.randrange(len(terrain)))
+                   for name in NAMES for _ in range(3)]
+        for name, start, end in queries:
+            if not (terrain.walls[start] or terrain.walls[end]):
+                cache.run(name, terrain, start, end)
+        before = terrain.fingerprint
+        cells = random_edits(rng, terrain, rng.randint(1, 3))
+        cache.edited(terrain, cells, before)
+        changed = terrain.fingerprint != before # edits may rewrite a cell as it was
+        for key, (result, reach, _) in cache.entries.items():
+            name, start, end = key[3:6]
+            assert key[0] == terrain.fingerprint
+            if changed:
+                assert name in BOUNDED and result.found and reach == result.cost + 1
+                kept += 1
+            assert fields(result) == fields(run(name, terrain, start, end))
+    assert kept > 100 # the check above saw enough carried-over entries
@@ -0,0 +1,45 @@
+import random # Import random for generated maps
+
+import pytest
+
+from landmarks import Landmarks, UNREACHED, distance_table
+from search import a_star, dijkstra
+
+from conftest import random_case, random_terrain
+
+# The bounds never overestimate the cost to the goal
+def test_estimates_are_lower_bounds():
+    rng = random.Random("bounds")
+    for _ in range(40):
+        terrain, _, end = random_case(rng)
+        estimate = Landmarks(terrain, count=rng.randint(1, 4)).estimate_to(end)
+        to_end = distance_table(terrain, end, backward=True)
+        for cell in range(len(terrain)):
+            if to_end[cell] != UNREACHED:
+                assert estimate(cell) <= to_end[cell]
+
+def test_save_and_load(tmp_path):
+    terrain = random_terrain(random.Random("save"), 18, 23, kept=(0, 18 * 23 - 1))
+    landmarks = Landmarks(terrain, count=3)
+    path = str(tmp_path / "map.alt")
+    landmarks.save(path)
+    loaded = Landmarks.load(path, terrain)
+    assert loaded.cells == landmarks.cells and not loaded.stale
+    assert loaded.forward == landmarks.forward and loaded.backward == landmarks.backward
+    end = len(terrain) - 1
+    built, read = landmarks.estimate_to(end), loaded.estimate_to(end)
+    assert [built(cell) for cell in range(len(terrain))] == [read(cell) for cell in range(len(terrain))]
+    assert a_star(terrain, 0, end, estimate=read).cost == dijkstra(terrain, 0, end).cost
+
+def test_load_checks_the_map(tmp_path):
+    terrain = random_terrain(random.Random("check"), 10, 10)
+    landmarks = Landmarks(terrain, count=2)
+    path = tmp_path / "map.alt"
+    landmarks.save(str(path))
+    terrain.edit(5, wall=1 - terrain.walls[5])
+    assert landmarks.stale
+    with pytest.raises(ValueError, match="different map"):
+        Landmarks.load(str(path), terrain)
+    path.write_bytes(b"JUNK" + path.read_bytes()[4:])
+    with pytest.raises(ValueError, match="not a landmark table file"):
+        Landmarks.load(str(path), terrain)
@@ -0,0 +1,97 @@
+import random # Import random for generated maps
+
+import pytest
+
+import mapio
+from grid import clear_search, grid_of, overlay_of, terrain_states, Terrain, OPEN, CLOSED, PATH
+from search import dijkstra
+
+from conftest import random_terrain
+
+# Random terrain for a seed
+def make_terrain(rows, cols, seed):
+    return random_terrain(random.Random(seed), rows, cols)
+
+def same_terrain(a, b):
+    return ((a.rows, a.cols, bytes(a.walls), bytes(a.weights))
+            == (b.rows, b.cols, bytes(b.walls), bytes(b.weights)))
+
+@pytest.mark.parametrize("mapped", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_round_trip(tmp_path, seed, mapped):
+    terrain = make_terrain(13, 29, seed)
+    path = str(tmp_path / "map.grid")
+    mapio.write_grid(path, terrain, 3, len(terrain) - 1)
+    loaded, start, end = mapio.load_map(path, mapped)
+    assert same_terrain(loaded, terrain)
+    assert (start, end) == (3, len(terrain) - 1)
+    assert loaded.fingerprint == terrain.fingerprint
+
+def test_grid_without_start_and_end(tmp_path):
+    path = str(tmp_path / "map.grid")
+    mapio.write_grid(path, make_terrain(4, 6, 0))
+    assert mapio.read_grid(path)[1:] == (None, None)
+
+def test_grid_rejects_bad_files(tmp_path):
+    path = tmp_path / "map.grid"
+    mapio.write_grid(str(path), make_terrain(4, 6, 0))
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        mapio.read_grid(str(path))
+    path.write_bytes(b"JUNK" + data[4:])
+    with pytest.raises(ValueError, match="not a binary map"):
+        mapio.read_grid(str(path))
+
+# A memory-mapped terrain is shown, searched, edited and cleared like a loaded one
+def test_mapped_terrain_in_grids(tmp_path):
+    terrain = make_terrain(20, 20, 7)
+    terrain.walls[0] = terrain.walls[399] = 0
+    path = str(tmp_path / "map.grid")
+    mapio.write_grid(path, terrain, 0, 399)
+    mapped = mapio.read_grid(path, mapped=True)[0]
+    assert terrain_states(mapped) == terrain_states(terrain)
+    assert dijkstra(mapped, 0, 399).cost == dijkstra(terrain, 0, 399).cost
+    for grid in (overlay_of(mapped), grid_of(mapped)):
+        assert grid.states == grid_of(terrain).states
+        grid.states[5] = OPEN
+        grid.states[6] = CLOSED
+        grid.states[7] = PATH
+        clear_search(grid)
+        assert grid.states == grid_of(terrain).states
+    mapped.edit(terrain.walls.index(0, 1), wall=1)
+    assert terrain_states(mapped) != terrain_states(terrain)
+    assert mapio.read_grid(path)[0].walls == terrain.walls # edits stay in memory
+
+@pytest.mark.parametrize("seed", range(5))
+def test_movingai_round_trip(tmp_path, seed):
+    terrain = make_terrain(11, 17, seed)
+    path = str(tmp_path / "map.map")
+    mapio.write_movingai(path, terrain)
+    assert same_terrain(mapio.read_movingai(path), terrain)
+    assert mapio.load_map(path)[1:] == (None, None) # no .scen next to it
+
+def test_movingai_rejects_other_weights(tmp_path):
+    terrain = Terrain(2, 2)
+    terrain.weights[0] = 2
+    with pytest.raises(ValueError):
+        mapio.write_movingai(str(tmp_path / "map.map"), terrain)
+
+def test_scen_round_trip(tmp_path):
+    terrain = make_terrain(15, 15, 3)
+    rng = random.Random(3)
+    open_cells = [index for index in range(len(terrain)) if not terrain.walls[index]]
+    pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for _ in range(10)]
+    mapio.write_movingai(str(tmp_path / "map.map"), terrain)
+    mapio.write_scen(str(tmp_path / "map.scen"), "map.map", terrain, pairs)
+
+    queries = mapio.read_scen(str(tmp_path / "map.scen"))
+    assert [(start, end) for _, start, end, _ in queries] == pairs
+    for _, start, end, optimal in queries:
+        result = dijkstra(terrain, start, end)
+        assert optimal == (result.cost if result.found else -1)
+
+    loaded, loaded_pairs = mapio.load_scen(str(tmp_path / "map.scen"))
+    assert same_terrain(loaded, terrain) and loaded_pairs == pairs
+    # the .map picks its start and end from the first query of the .scen
+    assert mapio.load_map(str(tmp_path / "map.map"))[1:] == pairs[0]
@@ -0,0 +1,95 @@
+import random # Import random for generated push and pop sequences
+
+import pytest
+
+from pqueue import BucketQueue, IndexedHeap, RadixHeap, QUEUES, make_queue
+
+# Pushes and pops the way the searches use a queue: priorities never drop
+# below the last pop, and grow by at most spread per step. Returns the pops.
+def monotone_run(queue, rng, steps=2000, spread=6):
+    pops = []
+    last = 0
+    for _ in range(steps):
+        if len(queue) and rng.random() < 0.45:
+            last = queue.peek()[0]
+            pops.append(queue.pop())
+            assert pops[-1][0] == last
+        else:
+            queue.push(last + rng.randint(0, spread), rng.randrange(10 ** 6))
+    while len(queue):
+        pops.append(queue.pop())
+    return pops
+
+@pytest.mark.parametrize("kind", sorted(QUEUES))
+@pytest.mark.parametrize("spread", [0, 1, 6, 300])
+def test_pops_in_priority_order(kind, spread):
+    rng = random.Random(f"{kind}-{spread}")
+    pops = monotone_run(make_queue(kind, 6), rng, spread=spread)
+    priorities = [priority for priority, _ in pops]
+    assert priorities == sorted(priorities)
+
+# Every push comes out once, with its priority (no decrease-keys: items differ)
+@pytest.mark.parametrize("kind", sorted(QUEUES))
+def test_pops_return_the_pushes(kind):
+    rng = random.Random(kind)
+    queue = make_queue(kind, 5)
+    pushed = [(rng.randint(0, 50), item) for item in range(500)]
+    for priority, item in pushed:
+        queue.push(priority, item)
+    assert len(queue) == len(pushed)
+    pops = [queue.pop() for _ in range(len(pushed))]
+    assert sorted(pops) == sorted(pushed) and len(queue) == 0
+
+# The heap and the bucket queue break ties first-in first-out
+@pytest.mark.parametrize("kind", ["heap", "dial"])
+def test_ties_first_in_first_out(kind):
+    queue = make_queue(kind, 5)
+    for item in range(20):
+        queue.push(7 + item % 2, item)
+    assert [queue.pop()[1] for _ in range(20)] == list(range(0, 20, 2)) + list(range(1, 20, 2))
+
+def test_bucket_queue_grows():
+    queue = BucketQueue(2)
+    width = queue.width
+    queue.push(10, "a")
+    queue.push(10 + 5 * width, "b") # past the end of the ring
+    assert queue.width > 5 * width
+    queue.push(3, "c")              # below the cursor
+    queue.push(11, "d")
+    assert [queue.pop() for _ in range(4)] == [(3, "c"), (10, "a"), (11, "d"), (10 + 5 * width, "b")]
+
+    # Growing with items queued across the ring's wrap-around keeps them in order
+    rng = random.Random("grow")
+    queue = BucketQueue(4)
+    pushed = []
+    for item in range(300):
+        low = queue.peek()[0] if len(queue) else 0
+        pushed.append((low + rng.randint(0, 40), item))
+        queue.push(*pushed[-1])
+        if rng.random() < 0.3:
+            popped = queue.pop()
+            assert popped[0] == min(pushed)[0]
+            pushed.remove(popped)
+    assert queue.width > 40
+    assert [queue.pop() for _ in range(len(queue))] == sorted(pushed)
+
+def test_radix_heap_rebases_and_widens():
+    queue = RadixHeap()
+    queue.push(100, "a")
+    assert queue.pop() == (100, "a")
+    queue.push(40, "b")       # below the last pop: rebased
+    queue.push(1 << 40, "c")  # beyond the 32 initial buckets
+    queue.push(41, "d")
+    assert [queue.pop() for _ in range(3)] == [(40, "b"), (41, "d"), (1 << 40, "c")]
+
+def test_indexed_heap_decreases_keys_in_place():
+    queue = IndexedHeap()
+    for item, priority in enumerate((9, 5, 7, 3)):
+        queue.push(priority, item)
+    queue.push(1, 0)  # decrease: 9 -> 1
+    queue.push(8, 1)  # not a decrease: ignored
+    assert len(queue) == 4
+    assert queue.peek() == (1, 0)
+    assert [queue.pop() for _ in range(4)] == [(1, 0), (3, 3), (5, 1), (7, 2)]
+    queue.push(6, 0)  # popped items can be queued again
+    assert len(queue) == 1 and queue.pop() == (6, 0)
@@ -0,0 +1,167 @@
+import random # Import random for generated pixel data
+import struct # Import struct to read image headers
+import zlib # Import zlib to read PNG data
+
+import pytest
+
+import render
+from grid import grid_of, Terrain
+from search import steps
+
+# Reference decoder for render.lzw_encode: GIF-flavored LZW, variable code
+# size from min_size + 1 bits up to 12. Checks that the stream ends right
+# after the end code, so a code written at the wrong width is caught.
+def lzw_decode(data, min_size):
+    clear = 1 << min_size
+    end = clear + 1
+    pos = bits = count = 0
+    size = min_size + 1
+    table = {i: bytes([i]) for i in range(clear)}
+    next_code = end + 1
+    prev = None
+    out = bytearray()
+    while True:
+        while count < size:
+            bits |= data[pos] << count
+            pos += 1
+            count += 8
+        code = bits & ((1 << size) - 1)
+        bits >>= size
+        count -= size
+        if code == clear:
+            table = {i: bytes([i]) for i in range(clear)}
+            size = min_size + 1
+            next_code = end + 1
+            prev = None
+            continue
+        if code == end:
+            assert pos == len(data), "data after the end code"
+            return bytes(out)
+        if code in table:
+            entry = table[code]
+        else:
+            assert code == next_code, f"bad code {code}"
+            entry = prev + prev[:1]
+        out += entry
+        if prev is not None and next_code < 4096:
+            table[next_code] = prev + entry[:1]
+            next_code += 1
+            if next_code == 1 << size and size < 12:
+                size += 1
+        prev = entry
+
+# (data, min_size) of an image data block, the sub-blocks joined
+def unblock(blocks):
+    data = bytearray()
+    i = 1
+    while blocks[i]:
+        data += blocks[i + 1:i + 1 + blocks[i]]
+        i += 1 + blocks[i]
+    assert i == len(blocks) - 1
+    return bytes(data), blocks[0]
+
+# Frames of a GIF as full canvases of palette indices
+def gif_frames(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:6] == b"GIF89a"
+    width, height, packed = struct.unpack("<HHB", data[6:11])
+    i = 13 + 3 * (2 << (packed & 7))
+    canvas = bytearray(width * height)
+    frames = []
+    while data[i] != 0x3B:
+        if data[i] == 0x21: # extension: skip its sub-blocks
+            i += 2
+            while data[i]:
+                i += 1 + data[i]
+            i += 1
+            continue
+        assert data[i] == 0x2C
+        left, top, w, h, _ = struct.unpack("<HHHHB", data[i + 1:i + 10])
+        j = i + 11
+        while data[j]:
+            j += 1 + data[j]
+        pixels = lzw_decode(*unblock(data[i + 10:j + 1]))
+        assert len(pixels) == w * h
+        for row in range(h):
+            first = (top + row) * width + left
+            canvas[first:first + w] = pixels[row * w:(row + 1) * w]
+        frames.append(bytes(canvas))
+        i = j + 1
+    return width, height, frames
+
+# (width, height, palette indices) of an indexed PNG
+def png_pixels(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    i = 8
+    idat = b""
+    while i < len(data):
+        length, kind = struct.unpack(">I4s", data[i:i + 8])
+        chunk = data[i + 8:i + 8 + length]
+        assert struct.unpack(">I", data[i + 8 + length:i + 12 + length])[0] == zlib.crc32(kind + chunk)
+        if kind == b"IHDR":
+            width, height = struct.unpack(">II", chunk[:8])
+        elif kind == b"IDAT":
+            idat += chunk
+        i += 12 + length
+    raw = zlib.decompress(idat)
+    return width, height, b"".join(raw[row * (width + 1) + 1:(row + 1) * (width + 1)]
+                                   for row in range(height))
+
+@pytest.mark.parametrize("seed", range(300))
+def test_lzw_round_trip(seed):
+    rng = random.Random(seed)
+    colors = rng.choice((2, 4, 16))
+    data = bytes(rng.randrange(colors) for _ in range(rng.randrange(1, 2000)))
+    assert lzw_decode(*unblock(render.lzw_encode(data, 4))) == data
+
+@pytest.mark.parametrize("data", [b"\x00", b"\x03" * 300000, bytes(range(16)) * 500],
+                         ids=["one", "long-run", "cycle"])
+def test_lzw_edge_cases(data):
+    assert lzw_decode(*unblock(render.lzw_encode(data, 4))) == data
+
+# Inputs whose last code makes the decoder's table reach the next code
+# size, so the end code has to be written one bit wider
+@pytest.mark.parametrize("seed", [831, 1877])
+def test_lzw_end_code_width(seed):
+    rng = random.Random(seed)
+    data = bytes(rng.randrange(16) for _ in range(rng.randrange(1, 2000)))
+    assert lzw_decode(*unblock(render.lzw_encode(data, 4))) == data
+
+def test_png_round_trip(tmp_path):
+    rng = random.Random(1)
+    width, height = 37, 23
+    pixels = bytearray(rng.randrange(16) for _ in range(width * height))
+    render.write_png(tmp_path / "image.png", width, height, pixels)
+    assert png_pixels(tmp_path / "image.png") == (width, height, bytes(pixels))
+
+def test_gif_frames(tmp_path):
+    rng = random.Random(2)
+    width, height = 40, 30
+    writer = render.GifWriter(str(tmp_path / "anim.gif"), width, height)
+    images = []
+    pixels = bytearray(width * height)
+    for _ in range(8):
+        for _ in range(rng.randrange(0, 50)):
+            pixels[rng.randrange(len(pixels))] = rng.randrange(16)
+        writer.add(pixels)
+        if not images or images[-1] != pixels: # repeated frames only lengthen the last one
+            images.append(bytes(pixels))
+    writer.close()
+    assert gif_frames(tmp_path / "anim.gif") == (width, height, images)
+
+def test_render_search_ends_on_snapshot(tmp_path):
+    terrain = Terrain(12, 15)
+    for cell in range(20, 30):
+        terrain.walls[cell] = 1
+    grid = grid_of(terrain)
+    grid.box(0).set_start()
+    grid.box(len(terrain) - 1).set_end()
+    result = render.render_search(grid, steps("astar", grid.terrain, 0, len(terrain) - 1),
+                                  str(tmp_path / "run.gif"), frames=10, cell=6)
+    assert result.found
+    render.snapshot(grid, tmp_path / "run.png", cell=6)
+    width, height, frames = gif_frames(tmp_path / "run.gif")
+    assert png_pixels(tmp_path / "run.png") == (width, height, frames[-1])
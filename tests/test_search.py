@@ -0,0 +1,204 @@
+import heapq # Import heapq for the reference Dijkstra
+import pickle # Import pickle to send an HPA* graph between processes
+import random # Import random for generated maps
+from collections import deque # Import deque for the reference BFS
+
+import pytest
+
+import search
+from hpa import HPAStar
+from incremental import LPAStar
+from landmarks import Landmarks
+from pqueue import QUEUES, make_queue
+from search import QUEUED, a_star, run
+from wavefront import HAVE_NUMPY
+
+from conftest import random_case, random_edits
+
+# Randomized cross-checks of the searches against the plain references
+# below, on small maps with walls, mud and water and random start and end.
+
+CASES = 150 # random maps per test
+
+# Cheapest cost from start to end, or None if end cannot be reached: moving
+# out of a cell costs its weight, walls cannot be entered or left
+def reference_cost(terrain, start, end):
+    cost = {start: 0}
+    queue = [(0, start)]
+    while queue:
+        g, cell = heapq.heappop(queue)
+        if cell == end:
+            return g
+        if g > cost[cell]:
+            continue
+        for neighbor in terrain.neighbors(cell):
+            new = g + terrain.weights[cell]
+            if new < cost.get(neighbor, new + 1):
+                cost[neighbor] = new
+                heapq.heappush(queue, (new, neighbor))
+    return None
+
+# Fewest steps from start to end, or None if end cannot be reached
+def reference_steps(terrain, start, end):
+    steps = {start: 0}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if cell == end:
+            return steps[cell]
+        for neighbor in terrain.neighbors(cell):
+            if neighbor not in steps:
+                steps[neighbor] = steps[cell] + 1
+                queue.append(neighbor)
+    return None
+
+# The result's path is a walk of open neighbors from start to end that costs result.cost
+def check_path(terrain, result, start, end):
+    path = result.path
+    assert path[0] == start and path[-1] == end
+    assert not any(terrain.walls[cell] for cell in path)
+    for cell, following in zip(path, path[1:]):
+        assert following in terrain.neighbors(cell)
+    assert result.cost == sum(terrain.weights[cell] for cell in path[:-1])
+
+def check_optimal(terrain, result, start, end):
+    optimal = reference_cost(terrain, start, end)
+    assert result.found == (optimal is not None)
+    if result.found:
+        check_path(terrain, result, start, end)
+        assert result.cost == optimal
+
+SEARCHES = [(name, queue) for name in QUEUED for queue in sorted(QUEUES)] + [("jps", None)]
+
+@pytest.mark.parametrize("name, queue", SEARCHES, ids=[f"{n}-{q}" for n, q in SEARCHES])
+def test_weighted_searches_are_optimal(name, queue):
+    rng = random.Random(f"{name}-{queue}")
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        result = run(name, terrain, start, end, queue=queue)
+        check_optimal(terrain, result, start, end)
+        assert result.pushes >= result.expansions and result.max_open <= result.pushes
+
+# JPS reuses its jump tables until an edit changes the terrain's fingerprint
+def test_jps_after_edits():
+    rng = random.Random("jps-edits")
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        for _ in range(3):
+            check_optimal(terrain, run("jps", terrain, start, end), start, end)
+            random_edits(rng, terrain, rng.randint(1, 4), (start, end))
+
+# The bucket queue is sized for the UI's weights and grows for heavier cells
+@pytest.mark.parametrize("name", QUEUED)
+def test_dial_queue_with_heavy_cells(name):
+    rng = random.Random(f"heavy-{name}")
+    for _ in range(CASES // 3):
+        terrain, start, end = random_case(rng)
+        for cell in rng.sample(range(len(terrain)), len(terrain) // 4):
+            terrain.weights[cell] = rng.randint(1, 255)
+        check_optimal(terrain, run(name, terrain, start, end, queue="dial"), start, end)
+
+# Queue that records the entries it really added, and the largest number
+# of entries that it and the other queues of its search held together
+class MeasuredQueue:
+    __slots__ = ("queue", "group", "peak", "added")
+
+    def __init__(self, queue, group):
+        self.queue = queue
+        self.group = group # the search's queues, this one included
+        self.peak = self.added = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, priority, item):
+        size = len(self.queue)
+        self.queue.push(priority, item)
+        if len(self.queue) > size:
+            self.added += 1
+        self.peak = max(self.peak, sum(len(queue) for queue in self.group))
+
+    def pop(self):
+        return self.queue.pop()
+
+    def peek(self):
+        return self.queue.peek()
+
+# pushes and max_open report real entries, also when the indexed heap
+# decreases keys in place instead of adding entries
+@pytest.mark.parametrize("name, queue", SEARCHES[:-1], ids=[f"{n}-{q}" for n, q in SEARCHES[:-1]])
+def test_open_set_counts_match_the_queue(monkeypatch, name, queue):
+    queues = []
+    def measured_queue(kind, span=8):
+        queues.append(MeasuredQueue(make_queue(kind, span), queues))
+        return queues[-1]
+    monkeypatch.setattr(search, "make_queue", measured_queue)
+    rng = random.Random(f"open-{name}-{queue}")
+    for _ in range(CASES // 3):
+        terrain, start, end = random_case(rng)
+        queues.clear()
+        result = run(name, terrain, start, end, queue=queue)
+        assert result.pushes == sum(measured.added for measured in queues)
+        assert result.max_open == max(measured.peak for measured in queues)
+
+@pytest.mark.parametrize("name", ["bfs", pytest.param("wavefront", marks=pytest.mark.skipif(
+    not HAVE_NUMPY, reason="the wavefront BFS needs NumPy"))])
+def test_bfs_takes_fewest_steps(name):
+    rng = random.Random(name)
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        result = run(name, terrain, start, end)
+        fewest = reference_steps(terrain, start, end)
+        assert result.found == (fewest is not None)
+        if result.found:
+            check_path(terrain, result, start, end)
+            assert result.path_length == fewest
+
+def test_alt_is_optimal():
+    rng = random.Random("alt")
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        landmarks = Landmarks(terrain, count=rng.randint(1, 4))
+        result = a_star(terrain, start, end, estimate=landmarks.estimate_to(end))
+        check_optimal(terrain, result, start, end)
+
+# LPA* repairs after edits find what a search from scratch finds
+def test_lpa_star_repairs_are_optimal():
+    rng = random.Random("lpastar")
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        planner = LPAStar(terrain, start, end)
+        check_optimal(terrain, planner.plan(), start, end)
+        for _ in range(3):
+            planner.update(random_edits(rng, terrain, rng.randint(1, 4), (start, end)))
+            check_optimal(terrain, planner.plan(), start, end)
+
+# HPA* paths are valid but not always the cheapest: they must find a path
+# exactly when one exists and never cost less than the optimum
+def test_hpa_star_finds_valid_paths():
+    rng = random.Random("hpa")
+    for _ in range(CASES):
+        terrain, start, end = random_case(rng)
+        planner = HPAStar(terrain, rng.choice((2, 3, 5, 8)))
+        for _ in range(3):
+            result = planner.plan(start, end)
+            optimal = reference_cost(terrain, start, end)
+            assert result.found == (optimal is not None)
+            if result.found:
+                check_path(terrain, result, start, end)
+                assert result.cost >= optimal
+            planner.update(random_edits(rng, terrain, rng.randint(1, 4), (start, end)))
+
+# joint_UI builds the cluster graph in a worker and moves it onto its terrain;
+# the graph then follows the terrain's edits like one built on it
+def test_hpa_star_graph_built_on_a_copy():
+    rng = random.Random("hpa-copy")
+    for _ in range(CASES // 3):
+        terrain, start, end = random_case(rng)
+        planner = pickle.loads(pickle.dumps(HPAStar(terrain.copy(), 4)))
+        planner.terrain = terrain
+        for _ in range(3):
+            planner.update(random_edits(rng, terrain, rng.randint(1, 4), (start, end)))
+            fresh = HPAStar(terrain, 4)
+            assert planner.nodes == fresh.nodes
+            assert planner.plan(start, end).cost == fresh.plan(start, end).cost
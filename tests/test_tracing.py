@@ -0,0 +1,88 @@
+import random # Import random for generated maps
+
+import pytest
+
+import tracing
+from search import ALGORITHMS, LABELS, run
+
+from conftest import random_terrain
+
+# Random terrain for a seed, with the corners open
+def make_terrain(size, seed):
+    return random_terrain(random.Random(seed), size, size, kept=(0, size * size - 1))
+
+def fields(result):
+    return (result.algorithm, result.found, list(result.path), result.cost, result.expansions,
+            result.pushes, result.max_open, result.elapsed)
+
+# A trace written with small blocks, so seeks cross block boundaries
+def write_trace(path, trace, terrain, start, end, block=7):
+    writer = tracing.TraceWriter(str(path), trace.algorithm, terrain, start, end, block)
+    for event, cell in trace:
+        writer.append(event, cell)
+    writer.close(trace.result)
+    return tracing.TraceFile(str(path))
+
+@pytest.mark.parametrize("name", sorted(ALGORITHMS))
+def test_trace_file_round_trip(tmp_path, name):
+    terrain = make_terrain(20, 1)
+    end = len(terrain) - 1
+    trace = tracing.record(name, terrain, 0, end)
+    loaded = write_trace(tmp_path / "run.trace", trace, terrain, 0, end)
+    try:
+        assert loaded.algorithm == name
+        assert (loaded.rows, loaded.cols, loaded.start, loaded.end) == (20, 20, 0, end)
+        assert fields(loaded.result) == fields(trace.result)
+        assert loaded.result.algorithm == LABELS[name] == run(name, terrain, 0, end).algorithm
+        assert list(loaded.events()) == list(trace)
+        assert list(loaded.load()) == list(trace)
+        loaded.check(terrain)
+    finally:
+        loaded.close()
+
+def test_trace_file_seek(tmp_path):
+    terrain = make_terrain(20, 3)
+    trace = tracing.record("dijkstra", terrain, 0, len(terrain) - 1)
+    events = list(trace)
+    loaded = write_trace(tmp_path / "run.trace", trace, terrain, 0, len(terrain) - 1)
+    try:
+        for first, stop in ((0, 0), (3, 4), (6, 8), (7, 14), (20, 61), (len(events) - 1, None)):
+            assert list(loaded.events(first, stop)) == events[first:stop]
+        assert list(loaded.events(5, len(events) + 10)) == events[5:]
+        replay = loaded.replay(10)
+        assert [next(replay) for _ in range(len(events) - 10)] == events[10:]
+        with pytest.raises(StopIteration) as stop:
+            next(replay)
+        assert fields(stop.value.value) == fields(trace.result)
+    finally:
+        loaded.close()
+
+def test_record_file(tmp_path):
+    terrain = make_terrain(25, 5)
+    end = len(terrain) - 1
+    result = tracing.record_file(str(tmp_path / "run.trace"), "astar", terrain, 0, end, "dial")
+    loaded = tracing.TraceFile(str(tmp_path / "run.trace"))
+    try:
+        assert fields(loaded.result) == fields(result)
+        assert list(loaded.events()) == list(tracing.record("astar", terrain, 0, end))
+    finally:
+        loaded.close()
+
+def test_trace_file_checks(tmp_path):
+    terrain = make_terrain(15, 4)
+    trace = tracing.record("bfs", terrain, 0, len(terrain) - 1)
+    trace.save(str(tmp_path / "run.trace"), terrain, 0, len(terrain) - 1)
+    loaded = tracing.TraceFile(str(tmp_path / "run.trace"))
+    edited = terrain.copy()
+    edited.edit(1, wall=1 - edited.walls[1])
+    with pytest.raises(ValueError, match="different map"):
+        loaded.check(edited)
+    loaded.close()
+
+    data = (tmp_path / "run.trace").read_bytes()
+    (tmp_path / "cut.trace").write_bytes(data[:-1])
+    with pytest.raises(ValueError, match="incomplete"):
+        tracing.TraceFile(str(tmp_path / "cut.trace"))
+    (tmp_path / "junk.trace").write_bytes(b"JUNK" + data[4:])
+    with pytest.raises(ValueError, match="not a trace file"):
+        tracing.TraceFile(str(tmp_path / "junk.trace"))
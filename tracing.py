@@ -0,0 +1,302 @@
+import argparse # Import argparse for the command line interface
+import mmap # Import mmap to read trace files without loading them
+import struct # Import struct for the trace file header and trailer
+from array import array # Import array for compact event storage
+from concurrent.futures import ProcessPoolExecutor # Import the process pool
+
+from instrument import Probe
+from search import OPEN, CLOSED, PATH, LABELS, SearchResult, steps
+
+# Search traces: a search is run once, headlessly, with every event recorded.
+# A trace can be replayed any number of times without searching again, and
+# several traces can be recorded at the same time in worker processes.
+
+# Events are packed into one integer each: cell << 2 | event code
+EVENT_CODES = {OPEN: 0, CLOSED: 1, PATH: 2}
+EVENT_NAMES = (OPEN, CLOSED, PATH)
+
+class Trace:
+    __slots__ = ("algorithm", "events", "result", "probe")
+
+    def __init__(self, algorithm, events=None, result=None, probe=None):
+        self.algorithm = algorithm  # name in search.ALGORITHMS
+        self.events = array("q") if events is None else events
+        self.result = result        # SearchResult of the recorded search
+        self.probe = probe          # instrument.Probe, if the search was instrumented
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def nbytes(self): # Size of the events, for cache.QueryCache(max_bytes=)
+        return len(self.events) * self.events.itemsize
+
+    def append(self, event, cell):
+        self.events.append(cell << 2 | EVENT_CODES[event])
+
+    # Yield the recorded (event, cell) pairs
+    def __iter__(self):
+        for packed in self.events:
+            yield EVENT_NAMES[packed & 3], packed >> 2
+
+    # Replay as a step generator (like search.steps): yields the events and
+    # returns the recorded result, so it can drive an animation.Track
+    def replay(self):
+        yield from self
+        return self.result
+
+    # Write the trace to a trace file (see TraceWriter)
+    def save(self, path, terrain, start, end):
+        writer = TraceWriter(path, self.algorithm, terrain, start, end)
+        for event, cell in self:
+            writer.append(event, cell)
+        writer.close(self.result)
+
+# Run a search and record its trace
+def record(name, terrain, start, end, instrument=False):
+    probe = Probe() if instrument else None
+    return record_steps(name, steps(name, terrain, start, end, probe), probe)
+
+# Record the trace of any step generator (e.g. an incremental.LPAStar repair)
+def record_steps(name, stepper, probe=None):
+    trace = Trace(name, probe=probe)
+    append = trace.events.append
+    codes = EVENT_CODES
+    while True:
+        try:
+            event, cell = next(stepper)
+        except StopIteration as stop:
+            trace.result = stop.value
+            return trace
+        append(cell << 2 | codes[event])
+
+# Process pool for recording traces, created on first use with a worker per
+# CPU, so it serves later requests of any size (extra searches queue up)
+_pool = None
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor()
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+# Start recording one trace per algorithm in the process pool; each worker
+# gets its own copy of the terrain. Returns one future per algorithm.
+def submit(names, terrain, start, end, instrument=False, pool=None):
+    pool = pool or get_pool()
+    return [pool.submit(record, name, terrain, start, end, instrument) for name in names]
+
+# Record one trace per algorithm in parallel and wait for all of them
+def record_parallel(names, terrain, start, end, instrument=False, pool=None):
+    return [future.result() for future in submit(names, terrain, start, end, instrument, pool)]
+
+# Trace files: the events of one search, written as they happen, so a run
+# on a large map can be recorded without holding its events in memory.
+#
+#   header   magic "TRC1", version, algorithm name length, rows, cols,
+#            terrain fingerprint, start, end, events per block; the name
+#   blocks   the events, BLOCK to a block, one varint each
+#   path     the result's path cells, as varints
+#   index    byte offset of each block (uint64)
+#   trailer  event count, index and path offsets, path length, found, cost,
+#            expansions, pushes, max open set size, elapsed, magic "TRC1"
+#
+# An event is (zigzag(cell - previous cell) << 2 | event code), as a LEB128
+# varint; consecutive events are usually neighbors, so most take one or two
+# bytes. previous restarts at 0 in every block, so a reader can start
+# decoding at any block: the index is a seek table, one checkpoint per block.
+
+TRACE_MAGIC = b"TRC1"
+TRACE_VERSION = 2
+BLOCK = 4096 # events per block
+TRACE_HEADER = struct.Struct("<4sHHIIQqqI")
+TRACE_TRAILER = struct.Struct("<QQQQ?qQQQd4s")
+
+# Append one event, as the varint of its cell's delta and its code
+def encode_event(buffer, delta, code):
+    value = (delta << 1 if delta >= 0 else (-delta << 1) - 1) << 2 | code
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+# Decode count varint events starting at offset; yields (code, cell)
+def decode_events(data, offset, count):
+    previous = 0
+    for _ in range(count):
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        zigzag = value >> 2
+        previous += (zigzag >> 1) ^ -(zigzag & 1)
+        yield value & 3, previous
+
+class TraceWriter:
+    __slots__ = ("file", "block", "index", "buffer", "previous", "count")
+
+    def __init__(self, path, algorithm, terrain, start, end, block=BLOCK):
+        name = algorithm.encode()
+        self.file = open(path, "wb")
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, len(name), terrain.rows,
+                                          terrain.cols, terrain.fingerprint, start, end, block))
+        self.file.write(name)
+        self.block = block
+        self.index = array("Q")  # byte offset of each block
+        self.buffer = bytearray() # the current block, written out when full
+        self.previous = 0
+        self.count = 0
+
+    def append(self, event, cell):
+        if self.count % self.block == 0:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+            self.index.append(self.file.tell())
+            self.previous = 0
+        encode_event(self.buffer, cell - self.previous, EVENT_CODES[event])
+        self.previous = cell
+        self.count += 1
+
+    # Write the result, the index and the trailer, and close the file
+    def close(self, result):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        path_offset = self.file.tell()
+        previous = 0
+        for cell in result.path:
+            encode_event(self.buffer, cell - previous, 0)
+            previous = cell
+        self.file.write(self.buffer)
+        index_offset = self.file.tell()
+        self.file.write(self.index)
+        self.file.write(TRACE_TRAILER.pack(self.count, index_offset, path_offset, len(result.path),
+                                           result.found, result.cost, result.expansions,
+                                           result.pushes, result.max_open, result.elapsed,
+                                           TRACE_MAGIC))
+        self.file.close()
+
+# A trace file opened for reading. The file is memory-mapped and events are
+# decoded as they are asked for, starting from the nearest block.
+class TraceFile:
+    __slots__ = ("path", "data", "algorithm", "rows", "cols", "fingerprint", "start", "end",
+                 "block", "count", "index", "result", "position")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.data
+        if len(data) < TRACE_HEADER.size + TRACE_TRAILER.size or data[:4] != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        (_, version, name_length, self.rows, self.cols, self.fingerprint,
+         self.start, self.end, self.block) = TRACE_HEADER.unpack_from(data)
+        if version != TRACE_VERSION:
+            raise ValueError(f"{path}: unsupported trace version {version}")
+        self.algorithm = data[TRACE_HEADER.size:TRACE_HEADER.size + name_length].decode()
+        (self.count, index_offset, path_offset, path_cells, found, cost, expansions, pushes,
+         max_open, elapsed, magic) = TRACE_TRAILER.unpack_from(data, len(data) - TRACE_TRAILER.size)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"{path} is incomplete (its recording did not finish)")
+        self.index = array("Q", data[index_offset:len(data) - TRACE_TRAILER.size])
+        path = [cell for _, cell in decode_events(data, path_offset, path_cells)]
+        # The header has the registry name ("astar"); results carry its label ("A*")
+        self.result = SearchResult(LABELS.get(self.algorithm, self.algorithm), found, path, cost, expansions, elapsed,
+                                   pushes, max_open)
+        self.position = 0 # number of events yielded by events() or replay() so far
+
+    def __len__(self):
+        return self.count
+
+    # Check that the trace was recorded on this terrain
+    def check(self, terrain):
+        if (terrain.rows, terrain.cols, terrain.fingerprint) != (self.rows, self.cols, self.fingerprint):
+            raise ValueError(f"{self.path} was recorded on a different map")
+
+    # Yield the (event, cell) pairs from event number first up to stop
+    def events(self, first=0, stop=None):
+        stop = self.count if stop is None else min(stop, self.count)
+        first = max(0, min(first, stop))
+        block = self.block
+        self.position = first
+        number = first // block
+        skip = first - number * block
+        while self.position < stop:
+            count = min(block, self.count - number * block)
+            for code, cell in decode_events(self.data, self.index[number], count):
+                if skip:
+                    skip -= 1
+                    continue
+                if self.position == stop:
+                    return
+                self.position += 1
+                yield EVENT_NAMES[code], cell
+            number += 1
+
+    # Replay from event number first as a step generator (like Trace.replay)
+    def replay(self, first=0):
+        yield from self.events(first)
+        return self.result
+
+    # Read the whole trace into memory
+    def load(self):
+        trace = Trace(self.algorithm, result=self.result)
+        for event, cell in self.events():
+            trace.append(event, cell)
+        return trace
+
+    def close(self):
+        self.data.close()
+
+# Record a search straight into a trace file; returns its SearchResult
+def record_file(path, name, terrain, start, end, queue=None):
+    writer = TraceWriter(path, name, terrain, start, end)
+    append = writer.append
+    stepper = steps(name, terrain, start, end, queue=queue)
+    while True:
+        try:
+            event, cell = next(stepper)
+        except StopIteration as stop:
+            writer.close(stop.value)
+            return stop.value
+        append(event, cell)
+
+# Record a search on a map file into a trace file
+#
+#   python tracing.py maps/scenario1.map astar astar.trace
+#   python joint_UI.py --map maps/scenario1.map --replay astar.trace
+def main(argv=None):
+    from mapio import load_map
+    from search import ALGORITHMS
+    parser = argparse.ArgumentParser(description="Record a search trace.")
+    parser.add_argument("map", help="map file (see mapio.py)")
+    parser.add_argument("algorithm", choices=sorted(ALGORITHMS))
+    parser.add_argument("out", help="trace file to write")
+    parser.add_argument("--start", type=int, nargs=2, metavar=("ROW", "COL"),
+                        help="start cell (default: the map's)")
+    parser.add_argument("--end", type=int, nargs=2, metavar=("ROW", "COL"),
+                        help="end cell (default: the map's)")
+    parser.add_argument("--queue", help="priority queue of the searches that take one")
+    args = parser.parse_args(argv)
+
+    terrain, start, end = load_map(args.map)
+    if args.start:
+        start = terrain.index(*args.start)
+    if args.end:
+        end = terrain.index(*args.end)
+    if start is None or end is None:
+        parser.error("the map has no start and end; give --start and --end")
+    result = record_file(args.out, args.algorithm, terrain, start, end, args.queue)
+    print(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import time # Import time for time-related functions
+
+try:
+    import numpy as np # Optional: only this engine needs NumPy
+except ImportError:
+    np = None
+
+from search import OPEN, CLOSED, finish
+
+# Wavefront BFS: breadth-first search that advances a whole frontier per
+# array operation instead of one cell per Python step. Meant for step
+# distances and reachability on grids with millions of cells; like BFS it
+# ignores weights (the reported cost still sums the weights along the path).
+#
+# Frontiers are NumPy arrays of cell indices, and dist holds the level at
+# which each cell was reached (-1 for not reached).
+
+HAVE_NUMPY = np is not None
+
+def require_numpy():
+    if np is None:
+        raise ImportError("the wavefront engine needs NumPy: pip install numpy")
+
+# Advance a wavefront from start, one level at a time. Yields each frontier
+# about to be expanded and the new cells it reaches, and fills in dist as it
+# goes; stops once end (if given) is reached or nothing new is.
+def advance(terrain, dist, start, end=None):
+    cols = terrain.cols
+    size = len(terrain)
+    walls = np.frombuffer(terrain.walls, dtype=np.uint8)
+    dist[start] = 0
+    frontier = np.array([start], dtype=np.int64)
+    level = 0
+    while frontier.size and start != end:
+        column = frontier % cols
+        reached = np.concatenate((
+            frontier[frontier < size - cols] + cols, # Down
+            frontier[frontier >= cols] - cols,       # Up
+            frontier[column != cols - 1] + 1,        # Right
+            frontier[column != 0] - 1,               # Left
+        ))
+        reached = reached[(walls[reached] == 0) & (dist[reached] < 0)]
+        level += 1
+        # Drop duplicates without sorting: of several writes to one cell only
+        # one survives, so keep the entries whose write did
+        order = np.arange(reached.size, dtype=np.int32)
+        dist[reached] = order
+        reached = reached[dist[reached] == order]
+        dist[reached] = level
+        yield frontier, reached
+        if end is not None and dist[end] >= 0:
+            return
+        frontier = reached
+
+# Step distance from start to every cell as a rows x cols int32 array, -1
+# where unreachable. With end given, stops at end's level, leaving farther
+# cells at -1.
+def distance_field(terrain, start, end=None):
+    require_numpy()
+    dist = np.full(len(terrain), -1, dtype=np.int32)
+    for _ in advance(terrain, dist, start, end):
+        pass
+    return dist.reshape(terrain.rows, terrain.cols)
+
+# Shortest path (in steps) from start to end over a distance field from
+# start, as a list of cell indices; empty if end was not reached
+def field_path(terrain, field, end):
+    dist = field.ravel()
+    level = int(dist[end])
+    if level < 0:
+        return []
+    path = [end]
+    current = end
+    while level:
+        level -= 1
+        current = next(p for p in terrain.neighbors(current) if dist[p] == level)
+        path.append(current)
+    path.reverse()
+    return path
+
+# Wavefront BFS as a step generator, like search.bfs_steps. With events it
+# reports each expanded level's cells, so animating it costs per-cell work.
+def wavefront_steps(terrain, start, end, probe=None, events=True):
+    require_numpy()
+    start_time = time.perf_counter()
+    if probe is not None:
+        mark = probe.begin()
+    dist = np.full(len(terrain), -1, dtype=np.int32)
+    expansions = 0
+    pushes = 1
+    max_open = 1
+    for frontier, reached in advance(terrain, dist, start, end):
+        expansions += frontier.size
+        pushes += reached.size
+        if reached.size > max_open:
+            max_open = reached.size
+        if events:
+            for cell in frontier.tolist():
+                yield CLOSED, cell
+            for cell in reached.tolist():
+                yield OPEN, cell
+
+    found = bool(dist[end] >= 0)
+    path = field_path(terrain, dist, end)
+    came_from = dict(zip(path[1:], path))
+    if probe is not None:
+        probe.end("expansion", mark)
+    return (yield from finish("Wavefront", terrain, came_from, start, end, found, expansions,
+                  start_time, events, probe, pushes=pushes,
+                  relaxations=pushes - 1, max_open=max_open))